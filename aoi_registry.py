@@ -0,0 +1,92 @@
+"""
+🗺️ AOI Registry
+Monitored areas of interest, loaded from aois.json or the Supabase `aois` table
+"""
+
+import json
+import os
+from pathlib import Path
+
+from http_transport import execute
+
+AOI_REGISTRY_PATH = Path(__file__).parent / "aois.json"
+AOI_TABLE = 'aois'
+
+
+def normalize_aoi(record):
+    """
+    Validate an AOI record and fill in defaults
+
+    Args:
+        record: Dict with 'id', 'name' and 'bounds' [min_lon, min_lat, max_lon, max_lat];
+                'latitude'/'longitude' default to the bounds centre
+
+    Returns:
+        New dictionary with id, name, bounds, latitude, longitude and enabled
+    """
+    for key in ('id', 'name', 'bounds'):
+        if not record.get(key):
+            raise ValueError(f"AOI record missing '{key}': {record}")
+
+    bounds = [float(value) for value in record['bounds']]
+    if len(bounds) != 4 or bounds[0] >= bounds[2] or bounds[1] >= bounds[3]:
+        raise ValueError(f"AOI '{record['id']}' bounds must be [min_lon, min_lat, max_lon, max_lat], got {bounds}")
+
+    # A stored 0.0 is a real coordinate (equator / prime meridian), only None means unset
+    latitude, longitude = record.get('latitude'), record.get('longitude')
+    return {
+        'id': str(record['id']),
+        'name': record['name'],
+        'bounds': bounds,
+        'latitude': float(latitude if latitude is not None else (bounds[1] + bounds[3]) / 2),
+        'longitude': float(longitude if longitude is not None else (bounds[0] + bounds[2]) / 2),
+        'enabled': bool(record.get('enabled', True))
+    }
+
+
+def aoi_polygon(aoi):
+    """Closed [lon, lat] ring of an AOI's bounds, as used by ee.Geometry.Polygon"""
+    min_lon, min_lat, max_lon, max_lat = aoi['bounds']
+    return [
+        [min_lon, min_lat],
+        [max_lon, min_lat],
+        [max_lon, max_lat],
+        [min_lon, max_lat],
+        [min_lon, min_lat]
+    ]
+
+
+def load_aois(path=AOI_REGISTRY_PATH, include_disabled=False):
+    """Load AOIs from a JSON file holding a list of AOI records"""
+    with open(path) as f:
+        records = json.load(f)
+    aois = [normalize_aoi(record) for record in records]
+    return _checked(aois, include_disabled)
+
+
+def load_aois_from_table(supabase, include_disabled=False):
+    """Load AOIs from the Supabase `aois` table (see gee_automation/setup_database.sql)"""
+    response = execute(supabase.table(AOI_TABLE).select('*'), f'supabase:{AOI_TABLE}')
+    aois = [normalize_aoi(record) for record in response.data or []]
+    return _checked(aois, include_disabled)
+
+
+def get_aoi(aoi_id, path=AOI_REGISTRY_PATH):
+    """Look up one AOI by id in the registry file"""
+    for aoi in load_aois(path, include_disabled=True):
+        if aoi['id'] == aoi_id:
+            return aoi
+    raise KeyError(f"Unknown AOI '{aoi_id}' in {path}")
+
+
+def default_aoi_id(fallback):
+    """AOI id from the AOI_ID environment variable, else the fallback"""
+    return os.getenv('AOI_ID', fallback)
+
+
+def _checked(aois, include_disabled):
+    ids = [aoi['id'] for aoi in aois]
+    duplicates = sorted({aoi_id for aoi_id in ids if ids.count(aoi_id) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate AOI ids: {', '.join(duplicates)}")
+    return aois if include_disabled else [aoi for aoi in aois if aoi['enabled']]
@@ -0,0 +1,147 @@
+"""
+🗓️ Multi-AOI Scheduler
+Runs the detection pipeline over every registered AOI in one process, sharing
+the loaded model, the Earth Engine session and the Supabase client
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from automated_inference import add_detector_arguments, detector_from_args
+from aoi_registry import AOI_REGISTRY_PATH, load_aois, load_aois_from_table
+from http_transport import default_transport
+from supabase_writer import WRITE_BATCH_ROWS
+
+# AOIs processed at once. EE queries, downloads and DB writes overlap;
+# U-Net inference is serialized by the detector's inference lock.
+DEFAULT_CONCURRENCY = 4
+
+
+class AOIScheduler:
+    """Runs MiningDetector.run_detection_pipeline for many AOIs with bounded concurrency"""
+
+    def __init__(self, detector, concurrency=DEFAULT_CONCURRENCY):
+        self.detector = detector
+        self.concurrency = max(1, concurrency)
+
+    def prepare(self):
+        """Initialize Earth Engine and load the model once for all AOIs"""
+        if not self.detector.ee_initialized and not self.detector.initialize_earth_engine():
+            return False
+        if self.detector.engine is None and not self.detector.load_model():
+            return False
+        return True
+
+    def run_aoi(self, aoi, days_back=30, force_alert=False):
+        """Run one AOI on a view of the shared detector and time it"""
+        view = self.detector.for_aoi(aoi)
+        start = time.perf_counter()
+        try:
+            success = view.run_detection_pipeline(days_back=days_back, force_alert=force_alert)
+            error = None
+        except Exception as e:
+            success, error = False, str(e)
+
+        result = {
+            'aoi_id': aoi['id'],
+            'name': aoi['name'],
+            'success': bool(success),
+            'seconds': time.perf_counter() - start
+        }
+        if view.last_result:
+            result.update(view.last_result)
+        if view.engine is not None and view.engine.last_stats is not None:
+            result['inference'] = view.engine.last_stats.as_dict()
+        if error:
+            result['error'] = error
+        return result
+
+    def run(self, aois, days_back=30, force_alert=False):
+        """
+        Run every AOI
+
+        Returns:
+            List of per-AOI results (success, timing, area, change, alert id), in AOI order
+        """
+        if not self.prepare():
+            return [{'aoi_id': aoi['id'], 'name': aoi['name'], 'success': False,
+                     'error': 'Detector setup failed'} for aoi in aois]
+
+        # Every AOI's latest-scene metadata in one Earth Engine round-trip
+        try:
+            self.detector.scene_metadata.latest_scenes([(aoi['bounds'], None) for aoi in aois], days_back)
+        except Exception as e:
+            print(f"⚠️  Batched scene lookup failed, falling back to per-AOI queries: {e}")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='aoi') as pool:
+            futures = {
+                pool.submit(self.run_aoi, aoi, days_back, force_alert): aoi['id']
+                for aoi in aois
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['aoi_id']] = result
+                status = '✅' if result['success'] else '❌'
+                print(f"{status} {result['name']}: {result['seconds']:.1f}s")
+
+        return [results[aoi['id']] for aoi in aois]
+
+
+def print_summary(results):
+    print("\n" + "=" * 60)
+    print("🗓️ MULTI-AOI RUN SUMMARY")
+    print("=" * 60)
+    for result in results:
+        status = '✅' if result['success'] else '❌'
+        area = f"{result['area_ha']:.2f} ha ({result['change_ha']:+.2f})" if 'area_ha' in result else '-'
+        print(f"{status} {result['aoi_id']:<24} {result.get('seconds', 0):7.1f}s  {area}")
+    succeeded = sum(result['success'] for result in results)
+    print(f"\n{succeeded}/{len(results)} AOIs completed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run mining detection over many AOIs')
+    parser.add_argument('--registry', default=str(AOI_REGISTRY_PATH), help='AOI registry JSON file')
+    parser.add_argument('--from-db', action='store_true', help='Load AOIs from the Supabase aois table instead')
+    parser.add_argument('--aoi', nargs='+', help='Only run these AOI ids')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help='AOIs processed at once')
+    parser.add_argument('--days-back', type=int, default=30)
+    parser.add_argument('--force-alert', action='store_true')
+    parser.add_argument('--output', help='Write per-AOI results as JSON to this path')
+    add_detector_arguments(parser)
+    # Many AOIs write many rows: batch them (flushed on close)
+    parser.set_defaults(write_batch_rows=WRITE_BATCH_ROWS)
+    args = parser.parse_args()
+
+    detector = detector_from_args(args)
+    try:
+        aois = load_aois_from_table(detector.supabase) if args.from_db else load_aois(args.registry)
+        if args.aoi:
+            aois = [aoi for aoi in aois if aoi['id'] in args.aoi]
+        if not aois:
+            print("❌ No AOIs to run")
+            sys.exit(1)
+
+        print(f"🗺️ {len(aois)} AOIs, {args.concurrency} at a time")
+        results = AOIScheduler(detector, args.concurrency).run(aois, args.days_back, args.force_alert)
+    finally:
+        detector.close()
+
+    print_summary(results)
+    print(detector.scene_metadata.summary())
+    print(default_transport().summary())
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"📄 Results saved to {args.output}")
+
+    sys.exit(0 if all(result['success'] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+⚡ Asyncio Detection Pipeline
+Overlaps Earth Engine queries, downloads, U-Net inference and Supabase writes
+across many AOI/date jobs, with bounded queues between the stages
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from automated_inference import TEMP_DIR, add_detector_arguments, detector_from_args
+from aoi_registry import AOI_REGISTRY_PATH, load_aois, load_aois_from_table
+from http_transport import default_transport
+from supabase_writer import WRITE_BATCH_ROWS
+
+# Concurrent coroutines per I/O stage
+FETCH_WORKERS = 4
+DOWNLOAD_WORKERS = 4
+WRITE_WORKERS = 4
+
+# Items allowed to wait between stages; a full queue pauses the stage before it
+QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+class StageStats:
+    """Busy time and item counts of one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def as_dict(self):
+        return {'items': self.items, 'failed': self.failed, 'busy_seconds': self.busy_seconds}
+
+
+class AsyncDetectionPipeline:
+    """
+    Four-stage pipeline: fetch -> download -> inference -> write
+
+    Each job is an AOI and an optional end date (for multi-date runs). EE
+    calls, downloads and Supabase writes are blocking client calls, so they
+    run in an I/O thread pool, downloads through the shared transport's
+    retries and concurrency limit (see http_transport). Inference runs
+    in its own single-thread executor (the backend brings its own threads
+    or worker processes), so the event loop keeps feeding the other stages
+    while the CPU is busy. Queues between the stages are bounded, which
+    limits how many downloaded scenes wait on disk for the model.
+
+    All dates of one AOI share one detector view (and so one mask store
+    and archive). Its inference and reports are serialized by a per-AOI
+    lock, and reports run in end-date order: a job that reaches the write
+    stage early waits, without holding a worker, until every earlier date
+    of its AOI has been reported or has failed.
+    """
+
+    def __init__(self, detector, fetch_workers=FETCH_WORKERS, download_workers=DOWNLOAD_WORKERS,
+                 write_workers=WRITE_WORKERS, queue_size=QUEUE_SIZE, days_back=30, force_alert=False):
+        self.detector = detector
+        self.workers = {'fetch': fetch_workers, 'download': download_workers, 'inference': 1, 'write': write_workers}
+        self.queue_size = queue_size
+        self.days_back = days_back
+        self.force_alert = force_alert
+        self.output_dir = Path(TEMP_DIR)
+        self.stats = {name: StageStats(name) for name in self.workers}
+        self.results = []
+        self.views = {}
+        self.view_locks = {}
+        self.pending = {}
+        self.write_locks = {}
+        self.io_pool = None
+
+    async def run(self, jobs):
+        """
+        Process jobs and return per-job results
+
+        Args:
+            jobs: List of {'aoi': AOI dict, 'end_date': optional datetime}
+        """
+        loop = asyncio.get_running_loop()
+        self.output_dir.mkdir(exist_ok=True)
+        io_workers = self.workers['fetch'] + self.workers['download'] + self.workers['write']
+        io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='pipeline-io')
+        self.io_pool = io_pool
+        cpu_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-inference')
+
+        # Earth Engine and the model are shared by every job
+        if not self.detector.ee_initialized and not await loop.run_in_executor(io_pool, self.detector.initialize_earth_engine):
+            return []
+        if self.detector.engine is None and not await loop.run_in_executor(cpu_pool, self.detector.load_model):
+            return []
+
+        # Scene metadata for every job in one Earth Engine round-trip; _fetch then hits the memo
+        queries = [(job['aoi']['bounds'], job.get('end_date')) for job in jobs]
+        try:
+            await loop.run_in_executor(io_pool, self.detector.scene_metadata.latest_scenes, queries, self.days_back)
+        except Exception as e:
+            print(f"⚠️  Batched scene lookup failed, falling back to per-job queries: {e}")
+
+        stages = [
+            ('fetch', lambda job: self._fetch(job, io_pool)),
+            ('download', lambda item: self._download(item, io_pool)),
+            ('inference', lambda item: self._infer(item, cpu_pool)),
+            ('write', lambda item: self._write(item, io_pool))
+        ]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in stages]
+
+        started = time.perf_counter()
+        try:
+            tasks = []
+            for index, (name, handler) in enumerate(stages):
+                out_queue = queues[index + 1] if index + 1 < len(queues) else None
+                tasks.append([
+                    asyncio.create_task(self._worker(name, handler, queues[index], out_queue))
+                    for _ in range(self.workers[name])
+                ])
+
+            for job in jobs:
+                job['view'] = self._view(job['aoi'])
+                self.pending.setdefault(job['aoi']['id'], []).append(job)
+            # Reports of each AOI go out oldest end date first (no end date = latest scene)
+            for pending in self.pending.values():
+                pending.sort(key=lambda job: job.get('end_date') or datetime.max)
+
+            for job in jobs:
+                job['started'] = time.perf_counter()
+                await queues[0].put(job)
+
+            # Drain stage by stage: each stage stops once the one before it has finished
+            for index, workers in enumerate(tasks):
+                for _ in workers:
+                    await queues[index].put(_DONE)
+                await asyncio.gather(*workers)
+        finally:
+            # Jobs abandoned mid-pipeline must not keep streaming pixel blocks
+            for job in jobs:
+                self._release(job)
+            io_pool.shutdown(wait=True)
+            cpu_pool.shutdown(wait=True)
+
+        self.wall_seconds = time.perf_counter() - started
+        return self.results
+
+    def _view(self, aoi):
+        """The detector view of an AOI, created once per run"""
+        view = self.views.get(aoi['id'])
+        if view is None:
+            view = self.views[aoi['id']] = self.detector.for_aoi(aoi)
+            self.view_locks[aoi['id']] = threading.Lock()
+            self.write_locks[aoi['id']] = asyncio.Lock()
+        return view
+
+    async def _worker(self, name, handler, in_queue, out_queue):
+        stats = self.stats[name]
+        while True:
+            item = await in_queue.get()
+            if item is _DONE:
+                return
+
+            start = time.perf_counter()
+            try:
+                output = await handler(item)
+            except Exception as e:
+                print(f"❌ {name} failed for {item['aoi']['id']}: {e}")
+                output = None
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += 1
+
+            if output is None:
+                stats.failed += 1
+                self._release(item)
+                self._record(item, False, failed_stage=name)
+                await self._resolve(item)
+            elif out_queue is not None:
+                await out_queue.put(output)
+
+    async def _fetch(self, job, io_pool):
+        view = job['view']
+        imagery = await asyncio.get_running_loop().run_in_executor(
+            io_pool, view.fetch_scene, self.days_back, job.get('end_date')
+        )
+        if not imagery:
+            return None
+        job['imagery'] = imagery
+        job['image_path'] = view.scene_path(imagery, self.output_dir)
+        return job
+
+    async def _download(self, job, io_pool):
+        if job['view'].pyramid:
+            # Pyramid jobs fetch their coarse and fine pieces during inference
+            return job
+        if job['view'].stream_pixels:
+            # Block requests start now and keep streaming while earlier jobs are on the model
+            job['source'] = job['view'].pixel_source(job['imagery']).start()
+            return job
+
+        # Split downloads run their own bounded pool of piece requests;
+        # cached scenes resolve to a path inside the scene cache
+        path = await asyncio.get_running_loop().run_in_executor(
+            io_pool, job['view'].download_scene, job['imagery'], job['image_path']
+        )
+        if path is None:
+            return None
+        job['image_path'] = path
+        return job
+
+    def _segment(self, job):
+        """Segment a job's scene; returns (mask, transform, crs) read under the AOI's lock"""
+        view = job['view']
+        with self.view_locks[job['aoi']['id']]:
+            if view.pyramid:
+                mask = view.run_pyramid_inference(job['imagery'], self.output_dir)
+            elif 'source' in job:
+                mask = view.infer_source(job['source'])
+            else:
+                mask = view.infer_scene(job['image_path'])
+            return mask, view.mask_transform, view.mask_crs
+
+    async def _infer(self, job, cpu_pool):
+        view = job['view']
+        try:
+            mask, transform, crs = await asyncio.get_running_loop().run_in_executor(cpu_pool, self._segment, job)
+        finally:
+            self._release(job)
+            if not view.scene_cache:
+                job['image_path'].unlink(missing_ok=True)
+        if mask is None:
+            return None
+        job['mask'] = mask
+        job['grid'] = (transform, crs)
+        return job
+
+    async def _write(self, job, io_pool):
+        job['ready'] = True
+        await self._drain(job['aoi']['id'])
+        return job
+
+    def _report(self, job):
+        """report_detection for one job, with the grid its mask was segmented on"""
+        view = job['view']
+        with self.view_locks[job['aoi']['id']]:
+            view.mask_transform, view.mask_crs = job.pop('grid')
+            ok = view.report_detection(job.pop('mask'), job['imagery'], self.force_alert)
+            job['result'] = view.last_result
+        return ok
+
+    async def _drain(self, aoi_id):
+        """Report the AOI's ready jobs in end-date order, up to the first one still in flight"""
+        pending = self.pending[aoi_id]
+        async with self.write_locks[aoi_id]:
+            while pending and pending[0].get('ready'):
+                job = pending.pop(0)
+                try:
+                    ok = await asyncio.get_running_loop().run_in_executor(self.io_pool, self._report, job)
+                except Exception as e:
+                    print(f"❌ write failed for {aoi_id}: {e}")
+                    ok = False
+                if ok:
+                    self._record(job, True)
+                else:
+                    self.stats['write'].failed += 1
+                    self._record(job, False, failed_stage='write')
+
+    async def _resolve(self, job):
+        """Drop a failed job from its AOI's write order and report the dates it was holding back"""
+        pending = self.pending.get(job['aoi']['id'], [])
+        if any(item is job for item in pending):
+            pending[:] = [item for item in pending if item is not job]
+            await self._drain(job['aoi']['id'])
+
+    @staticmethod
+    def _release(job):
+        """Close a started pixel source (idempotent), so a failed job stops its block requests"""
+        source = job.pop('source', None)
+        if source is not None:
+            source.close()
+
+    def _record(self, job, success, failed_stage=None):
+        result = {
+            'aoi_id': job['aoi']['id'],
+            'end_date': job['end_date'].strftime('%Y-%m-%d') if job.get('end_date') else None,
+            'success': success,
+            'seconds': time.perf_counter() - job['started']
+        }
+        if job.get('result'):
+            result.update(job['result'])
+        if failed_stage:
+            result['failed_stage'] = failed_stage
+        self.results.append(result)
+
+    def report(self):
+        """Wall time next to each stage's busy time; overlap shows as wall < sum of stages"""
+        stages = {name: stats.as_dict() for name, stats in self.stats.items()}
+        return {
+            'wall_seconds': self.wall_seconds,
+            'stage_seconds_sum': sum(stats.busy_seconds for stats in self.stats.values()),
+            'stages': stages
+        }
+
+
+def print_report(report):
+    print("\n⚡ Pipeline stages:")
+    for name, stage in report['stages'].items():
+        print(f"   {name:<10} {stage['items']:4d} items, {stage['failed']} failed, {stage['busy_seconds']:8.1f}s busy")
+    print(f"   Wall time {report['wall_seconds']:.1f}s vs {report['stage_seconds_sum']:.1f}s of stage work")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Overlapped mining detection over many AOIs and dates')
+    parser.add_argument('--registry', default=str(AOI_REGISTRY_PATH), help='AOI registry JSON file')
+    parser.add_argument('--from-db', action='store_true', help='Load AOIs from the Supabase aois table instead')
+    parser.add_argument('--aoi', nargs='+', help='Only run these AOI ids')
+    parser.add_argument('--dates', nargs='+', help='End dates (YYYY-MM-DD) to run each AOI for (default: today)')
+    parser.add_argument('--days-back', type=int, default=30)
+    parser.add_argument('--force-alert', action='store_true')
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS)
+    parser.add_argument('--download-workers', type=int, default=DOWNLOAD_WORKERS)
+    parser.add_argument('--write-workers', type=int, default=WRITE_WORKERS)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE, help='Items buffered between stages')
+    parser.add_argument('--output', help='Write per-job results as JSON to this path')
+    add_detector_arguments(parser)
+    # Many AOIs write many rows: batch them (flushed on close)
+    parser.set_defaults(write_batch_rows=WRITE_BATCH_ROWS)
+    args = parser.parse_args()
+
+    detector = detector_from_args(args)
+    try:
+        aois = load_aois_from_table(detector.supabase) if args.from_db else load_aois(args.registry)
+        if args.aoi:
+            aois = [aoi for aoi in aois if aoi['id'] in args.aoi]
+        end_dates = [datetime.strptime(date, '%Y-%m-%d') for date in args.dates] if args.dates else [None]
+        jobs = [{'aoi': aoi, 'end_date': end_date} for aoi in aois for end_date in end_dates]
+        if not jobs:
+            print("❌ No jobs to run")
+            sys.exit(1)
+
+        pipeline = AsyncDetectionPipeline(
+            detector,
+            fetch_workers=args.fetch_workers,
+            download_workers=args.download_workers,
+            write_workers=args.write_workers,
+            queue_size=args.queue_size,
+            days_back=args.days_back,
+            force_alert=args.force_alert
+        )
+        print(f"⚡ {len(jobs)} jobs ({len(aois)} AOIs x {len(end_dates)} dates)")
+        results = asyncio.run(pipeline.run(jobs))
+    finally:
+        detector.close()
+
+    if not results:
+        print("❌ Pipeline setup failed")
+        sys.exit(1)
+
+    print_report(pipeline.report())
+    print(detector.scene_metadata.summary())
+    print(default_transport().summary())
+    succeeded = sum(result['success'] for result in results)
+    print(f"\n{succeeded}/{len(jobs)} jobs completed")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'report': pipeline.report()}, f, indent=2, default=str)
+        print(f"📄 Results saved to {args.output}")
+
+    sys.exit(0 if succeeded == len(jobs) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+⏪ Time-Series Backfill
+Runs the detector over every qualifying Sentinel-2 scene of an AOI in a date
+range, processing scenes in parallel, writing predictions in bulk and
+checkpointing progress so an interrupted backfill resumes where it stopped
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import ee
+
+from automated_inference import STUDY_AREA, add_detector_arguments, detector_from_args
+from aoi_registry import get_aoi
+from ee_batch import CLOUD_THRESHOLD, list_scenes
+from http_transport import default_transport
+from incremental import aoi_key
+from supabase_writer import upsert_rows
+
+CHECKPOINT_DIR = "state/backfill"
+
+# Scenes in flight at once: downloads overlap, U-Net inference is serialized
+BACKFILL_WORKERS = 4
+
+# Prediction rows per bulk insert
+BULK_INSERT_ROWS = 50
+
+
+class BackfillCheckpoint:
+    """
+    JSON record of a backfill's progress
+
+    'rows' holds the prediction row of every processed scene that is not in
+    the database yet; 'written' lists the scenes whose rows were inserted.
+    A scene that failed is in neither and is retried on the next run.
+    'end' is the end date of the latest run; the file is keyed on AOI and
+    start date only, so a rerun with a later end resumes the same record.
+    The file is replaced atomically on every save.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.rows = {}
+        self.written = set()
+        self.end = None
+        if self.path.exists():
+            with open(self.path) as f:
+                state = json.load(f)
+            self.rows = state.get('rows', {})
+            self.written = set(state.get('written', []))
+            self.end = state.get('end')
+
+    def is_done(self, scene_id):
+        return scene_id in self.written or scene_id in self.rows
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'end': self.end, 'rows': self.rows, 'written': sorted(self.written)}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class Backfill:
+    """Parallel detection over a list of scenes of one AOI"""
+
+    def __init__(self, detector, aoi, start, end, workers=BACKFILL_WORKERS, bulk_rows=BULK_INSERT_ROWS,
+                 checkpoint_dir=CHECKPOINT_DIR, cloud_threshold=CLOUD_THRESHOLD):
+        self.detector = detector
+        self.aoi = aoi
+        self.start = start
+        self.end = end
+        self.workers = max(1, workers)
+        self.bulk_rows = bulk_rows
+        self.cloud_threshold = cloud_threshold
+        self.checkpoint = BackfillCheckpoint(Path(checkpoint_dir) / f"{aoi_key(aoi['id'])}_{start}.json")
+        self.lock = threading.Lock()
+        self.failed = []
+        self.views = threading.local()
+
+    def scenes(self):
+        """Every scene of the date range (one per acquisition date), oldest first"""
+        return list_scenes(self.aoi['bounds'], self.start, self.end, self.cloud_threshold)
+
+    def worker_view(self, archive):
+        """
+        This thread's view of the AOI
+
+        Each worker gets its own view, since a view keeps the transform of
+        the mask it segmented last; all of them append to one MaskArchive.
+        Incremental state is dropped: scenes finish out of date order, so
+        "the previous scene" would keep flipping between unrelated dates.
+        """
+        view = getattr(self.views, 'view', None)
+        if view is None:
+            view = self.views.view = self.detector.for_aoi(self.aoi)
+            view.mask_archive = archive
+            if view.incremental is not None:
+                view.incremental = None
+                if view.engine is not None:
+                    view.engine.tile_filters = view.tile_filters()
+        return view
+
+    def process_scene(self, archive, scene):
+        """Segment one scene; returns its prediction row or None"""
+        view = self.worker_view(archive)
+        imagery = dict(scene, image=ee.Image(scene['id']).select(view.scene_bands()))
+        mask = view.detect_scene(imagery)
+        if mask is None:
+            return None
+        view.archive_mask(mask, scene['date'])
+        area_ha = view.calculate_area(mask)
+        notes = f"Backfill from satellite imagery. Cloud cover: {scene['cloud_cover']:.1f}%"
+        return view.prediction_row(area_ha, scene['date'], notes)
+
+    def flush(self, force=False):
+        """Bulk upsert buffered rows once bulk_rows are waiting (or any with force)"""
+        with self.lock:
+            if not self.checkpoint.rows or (len(self.checkpoint.rows) < self.bulk_rows and not force):
+                return 0
+            rows = dict(self.checkpoint.rows)
+
+        # Upserted on the rows' idempotency keys, so a batch retried after a lost response is not duplicated
+        upsert_rows(self.detector.supabase, 'mining_predictions', list(rows.values()))
+        with self.lock:
+            for scene_id in rows:
+                self.checkpoint.rows.pop(scene_id, None)
+                self.checkpoint.written.add(scene_id)
+            self.checkpoint.save()
+        print(f"💾 Inserted {len(rows)} predictions")
+        return len(rows)
+
+    def run(self):
+        """
+        Process every scene not yet in the checkpoint
+
+        Returns:
+            Dict with scene counts, failures and timing
+        """
+        started = time.perf_counter()
+        if not self.detector.ee_initialized and not self.detector.initialize_earth_engine():
+            return None
+        if self.detector.engine is None and not self.detector.load_model():
+            return None
+
+        scenes = self.scenes()
+        with self.lock:
+            self.checkpoint.end = self.end
+            self.checkpoint.save()
+        todo = [scene for scene in scenes if not self.checkpoint.is_done(scene['id'])]
+        print(f"⏪ {len(scenes)} scenes from {self.start} to {self.end}, "
+              f"{len(scenes) - len(todo)} already done, {len(todo)} to process")
+
+        archive = self.detector.for_aoi(self.aoi).mask_archive
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backfill') as pool:
+            futures = {pool.submit(self.process_scene, archive, scene): scene for scene in todo}
+            for future in as_completed(futures):
+                scene = futures[future]
+                date = scene['date'].strftime('%Y-%m-%d')
+                try:
+                    row = future.result()
+                except Exception as e:
+                    print(f"❌ {date}: {e}")
+                    row = None
+
+                if row is None:
+                    self.failed.append(scene['id'])
+                    continue
+                with self.lock:
+                    self.checkpoint.rows[scene['id']] = row
+                    self.checkpoint.save()
+                print(f"✅ {date}: {row['mining_area_ha']:.2f} ha")
+                self.flush()
+
+        self.flush(force=True)
+        return {
+            'aoi_id': self.aoi['id'],
+            'scenes': len(scenes),
+            'processed': len(todo) - len(self.failed),
+            'skipped': len(scenes) - len(todo),
+            'failed': self.failed,
+            'seconds': time.perf_counter() - started
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill mining detections over a date range')
+    parser.add_argument('--aoi', help='AOI id from aois.json (default: Chingola)')
+    parser.add_argument('--start', required=True, help='First date (YYYY-MM-DD)')
+    parser.add_argument('--end', default=datetime.now().strftime('%Y-%m-%d'),
+                       help='End date, exclusive (YYYY-MM-DD); reruns with the same --start resume one checkpoint')
+    parser.add_argument('--backfill-workers', type=int, default=BACKFILL_WORKERS,
+                       help='Scenes processed at once')
+    parser.add_argument('--bulk-rows', type=int, default=BULK_INSERT_ROWS,
+                       help='Predictions per bulk database insert')
+    parser.add_argument('--cloud-threshold', type=float, default=CLOUD_THRESHOLD,
+                       help='Maximum scene cloud percentage')
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+    add_detector_arguments(parser)
+    args = parser.parse_args()
+
+    aoi = get_aoi(args.aoi) if args.aoi else STUDY_AREA
+    detector = detector_from_args(args, aoi=aoi)
+    backfill = Backfill(detector, detector.aoi, args.start, args.end, workers=args.backfill_workers,
+                        bulk_rows=args.bulk_rows, checkpoint_dir=args.checkpoint_dir,
+                        cloud_threshold=args.cloud_threshold)
+    if args.restart:
+        backfill.checkpoint.rows, backfill.checkpoint.written = {}, set()
+
+    try:
+        report = backfill.run()
+    finally:
+        detector.close()
+
+    if report is None:
+        print("❌ Backfill setup failed")
+        sys.exit(1)
+
+    print(f"\n⏪ {report['processed']} processed, {report['skipped']} skipped, "
+          f"{len(report['failed'])} failed in {report['seconds']:.0f}s")
+    print(default_transport().summary())
+    sys.exit(0 if not report['failed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
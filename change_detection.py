@@ -0,0 +1,145 @@
+"""
+🔀 Pixel-Level Change Detection
+Keeps each AOI's previous mask in a local store and diffs it pixel by pixel
+against the current one: gained, lost and persistent area plus a change raster
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+MASK_STORE_DIR = "state/masks"
+
+# Rows diffed per step; bounds temporaries to a strip of the raster on large AOIs
+CHANGE_STRIP_ROWS = 1024
+
+# Change raster codes: previous + 2 * current
+NO_MINING = 0
+LOST = 1
+GAINED = 2
+PERSISTENT = 3
+
+
+def mask_change(previous, current, out=None, strip_rows=CHANGE_STRIP_ROWS):
+    """
+    Pixel-wise diff of two binary masks of the same grid
+
+    Works strip by strip, so previous/current can be np.memmaps larger
+    than memory and out can be a memmap too.
+
+    Args:
+        previous, current: [H, W] masks (non-zero = mining)
+        out: Optional uint8 [H, W] array receiving the change codes
+
+    Returns:
+        (int64 [H, 4] per-row pixel counts indexed by change code, change raster)
+    """
+    if previous.shape != current.shape:
+        raise ValueError(f"mask shapes differ: {previous.shape} vs {current.shape}")
+    if out is None:
+        out = np.empty(current.shape, dtype=np.uint8)
+
+    counts = np.zeros((current.shape[0], 4), dtype=np.int64)
+    for top in range(0, current.shape[0], strip_rows):
+        rows = slice(top, top + strip_rows)
+        codes = out[rows]
+        np.not_equal(previous[rows], 0, out=codes, casting='unsafe')
+        codes += 2 * (current[rows] != 0).view(np.uint8)
+        # Per-row counts, so areas can vary by row (see pixel_area.py)
+        for code in range(4):
+            counts[rows, code] = np.count_nonzero(codes == code, axis=1)
+    return counts, out
+
+
+def change_areas(counts, pixel_area_ha):
+    """
+    Gained, lost and persistent hectares from mask_change per-row pixel counts
+
+    Args:
+        pixel_area_ha: Hectares per pixel, scalar or per-row array
+    """
+    areas = np.broadcast_to(np.asarray(pixel_area_ha, dtype=np.float64), (counts.shape[0],)) @ counts
+    gained, lost, persistent = areas[GAINED], areas[LOST], areas[PERSISTENT]
+    return {
+        'gained_ha': float(gained),
+        'lost_ha': float(lost),
+        'persistent_ha': float(persistent),
+        'previous_area': float(lost + persistent),
+        'change_ha': float(gained - lost)
+    }
+
+
+class PackedMask:
+    """Read-only [H, W] view of a row-wise bit-packed mask that unpacks only the rows sliced"""
+
+    def __init__(self, packed, shape):
+        self.packed = packed
+        self.shape = tuple(shape)
+
+    def __getitem__(self, rows):
+        return np.unpackbits(self.packed[rows], axis=1, count=self.shape[1])
+
+    def __array__(self, dtype=None, copy=None):
+        mask = self[:self.shape[0]]
+        return mask if dtype is None else mask.astype(dtype)
+
+
+class MaskStore:
+    """
+    Latest mask of one AOI on local disk
+
+    mask.npy holds the bit-packed mask (one bit per pixel) and meta.json
+    its shape, date and grid tag; both are replaced atomically. The last
+    change raster is kept next to them as change.npy for downstream use.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @property
+    def mask_path(self):
+        return self.directory / 'mask.npy'
+
+    @property
+    def meta_path(self):
+        return self.directory / 'meta.json'
+
+    @property
+    def change_path(self):
+        return self.directory / 'change.npy'
+
+    def load(self, grid=None):
+        """
+        Previous (PackedMask, meta), or (None, meta) if there is none for this grid
+
+        Args:
+            grid: Tag of the pixel grid (e.g. scale); a stored mask made on
+                  another grid cannot be diffed pixel by pixel
+        """
+        if not self.mask_path.exists() or not self.meta_path.exists():
+            return None, None
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        if grid is not None and meta.get('grid') != grid:
+            return None, meta
+        return PackedMask(np.load(self.mask_path, mmap_mode='r'), meta['shape']), meta
+
+    def save(self, mask, date, grid=None, **info):
+        """Store mask as the AOI's latest"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / 'mask.tmp.npy'
+        np.save(tmp_path, np.packbits(np.asarray(mask) != 0, axis=1))
+        meta = dict(info, shape=list(mask.shape), date=date, grid=grid)
+        meta_tmp = self.meta_path.with_suffix('.json.tmp')
+        with open(meta_tmp, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.mask_path)
+        os.replace(meta_tmp, self.meta_path)
+
+    def save_change(self, change):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / 'change.tmp.npy'
+        np.save(tmp_path, change)
+        os.replace(tmp_path, self.change_path)
@@ -0,0 +1,160 @@
+"""
+🛰️ Batched Earth Engine Metadata
+Scene counts and latest-image properties for one or many AOI/date queries,
+gathered in a single server-side ee.Dictionary evaluation and memoized for the run
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import ee
+
+from http_transport import default_transport
+
+S2_COLLECTION = 'COPERNICUS/S2_SR_HARMONIZED'
+CLOUD_THRESHOLD = 20
+
+# Image properties read from the latest scene; everything else stays on the server
+SCENE_PROPERTIES = ['system:index', 'system:time_start', 'CLOUDY_PIXEL_PERCENTAGE']
+
+
+def evaluate(values, endpoint='ee:getInfo'):
+    """
+    Evaluate a dict of EE objects with one getInfo round-trip
+
+    Args:
+        values: Dict of name -> ee.ComputedObject (or plain values)
+
+    Returns:
+        Dict of name -> client-side value
+    """
+    return default_transport().call(ee.Dictionary(values).getInfo, endpoint)
+
+
+def date_window(days_back, end_date=None):
+    """('YYYY-MM-DD', 'YYYY-MM-DD') filterDate window ending at end_date (default now)"""
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=days_back)
+    return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+
+
+def sentinel2_collection(geometry, start, end, cloud_threshold=CLOUD_THRESHOLD):
+    """Sentinel-2 SR scenes over geometry between start and end under cloud_threshold percent"""
+    return ee.ImageCollection(S2_COLLECTION) \
+        .filterBounds(geometry) \
+        .filterDate(start, end) \
+        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', cloud_threshold))
+
+
+def collection_summary(collection):
+    """
+    Server-side summary of a collection: image count plus the selected
+    properties of its most recent image
+
+    The latest image's properties are aggregated from a one-image
+    collection, so an empty collection yields empty lists instead of an
+    error and no conditional is needed on the server.
+    """
+    latest = collection.sort('system:time_start', False).limit(1)
+    summary = {'count': collection.size()}
+    for name in SCENE_PROPERTIES:
+        summary[name] = latest.aggregate_array(name)
+    return ee.Dictionary(summary)
+
+
+def scene_from_summary(summary):
+    """Client-side scene record from an evaluated collection_summary, or None when empty"""
+    if not summary['count']:
+        return None
+    index = summary['system:index'][0]
+    return {
+        'id': f'{S2_COLLECTION}/{index}',
+        'date': datetime.fromtimestamp(summary['system:time_start'][0] / 1000),
+        'cloud_cover': summary['CLOUDY_PIXEL_PERCENTAGE'][0],
+        'count': summary['count']
+    }
+
+
+def list_scenes(bounds, start, end, cloud_threshold=CLOUD_THRESHOLD, one_per_day=True):
+    """
+    Every qualifying scene over bounds between start and end ('YYYY-MM-DD'), in one round-trip
+
+    Args:
+        one_per_day: Keep only the least cloudy scene of each acquisition date
+                     (neighbouring granules of one pass share a date)
+
+    Returns:
+        List of scene dicts (id, date, cloud_cover), oldest first
+    """
+    collection = sentinel2_collection(ee.Geometry.Rectangle(list(bounds)), start, end, cloud_threshold)
+    values = evaluate({name: collection.aggregate_array(name) for name in SCENE_PROPERTIES})
+
+    scenes = [
+        {
+            'id': f'{S2_COLLECTION}/{index}',
+            'date': datetime.fromtimestamp(time_start / 1000),
+            'cloud_cover': cloud_cover
+        }
+        for index, time_start, cloud_cover in zip(*(values[name] for name in SCENE_PROPERTIES))
+    ]
+    # Least cloudy granule of each day first, so one_per_day keeps it
+    scenes.sort(key=lambda scene: (scene['date'].date(), scene['cloud_cover']))
+    if one_per_day:
+        by_day = {}
+        for scene in scenes:
+            by_day.setdefault(scene['date'].date(), scene)
+        scenes = list(by_day.values())
+    return scenes
+
+
+class SceneMetadata:
+    """
+    Memoized latest-scene lookups keyed by (bounds, date window, cloud threshold)
+
+    latest_scenes() evaluates every query that is not memoized yet in one
+    ee.Dictionary, so prefetching all AOIs (or all dates) of a run costs a
+    single round-trip and later per-AOI lookups are answered locally.
+    """
+
+    def __init__(self, cloud_threshold=CLOUD_THRESHOLD):
+        self.cloud_threshold = cloud_threshold
+        self.memo = {}
+        self.lock = threading.Lock()
+        self.round_trips = 0
+
+    def _key(self, bounds, days_back, end_date):
+        return (tuple(float(b) for b in bounds),) + date_window(days_back, end_date) + (self.cloud_threshold,)
+
+    def latest_scenes(self, queries, days_back=30):
+        """
+        Latest scene for each (bounds, end_date) query
+
+        Returns:
+            List of scene dicts (id, date, cloud_cover, count) or None, in query order
+        """
+        keys = [self._key(bounds, days_back, end_date) for bounds, end_date in queries]
+        with self.lock:
+            missing = list(dict.fromkeys(key for key in keys if key not in self.memo))
+
+        if missing:
+            summaries = {
+                str(index): collection_summary(
+                    sentinel2_collection(ee.Geometry.Rectangle(list(key[0])), key[1], key[2], key[3])
+                )
+                for index, key in enumerate(missing)
+            }
+            values = evaluate(summaries)
+            with self.lock:
+                self.round_trips += 1
+                for index, key in enumerate(missing):
+                    self.memo[key] = scene_from_summary(values[str(index)])
+
+        with self.lock:
+            return [self.memo[key] for key in keys]
+
+    def latest_scene(self, bounds, days_back=30, end_date=None):
+        """Latest scene over bounds in the window ending at end_date, or None"""
+        return self.latest_scenes([(bounds, end_date)], days_back)[0]
+
+    def summary(self):
+        return f"EE metadata: {len(self.memo)} queries in {self.round_trips} round-trips"
@@ -0,0 +1,181 @@
+"""
+📡 Earth Engine Pixel Streaming
+Tile source that pulls raw pixel blocks with ee.data.computePixels straight
+into NumPy, in parallel, with no GeoTIFF written to or decoded from disk
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+import numpy as np
+
+from http_transport import default_transport
+from raster_io import DTYPE_SCALES
+from split_download import region_grid, plan_pieces
+
+# computePixels answers at most 48MB and 32768 px per side; 512 px blocks of
+# four uint16 bands are 2MB each, small enough to keep many requests in flight
+PIXEL_BLOCK_SIZE = 512
+PIXEL_WORKERS = 8
+
+
+class EEPixelSource:
+    """
+    Tile source over an ee.Image on a fixed EPSG:4326 grid
+
+    The AOI grid (same as split_download.region_grid) is cut into square
+    blocks that are requested in the engine's row-major tile order. Only a
+    sliding window of block rows is in flight or held at once: start()
+    submits the first rows, each read_window() that moves down submits the
+    rows ahead of it and drops the rows above it. read_tile() waits only
+    for the blocks under the tile, so the first batches reach the model
+    while later blocks are still in flight, and memory stays bounded by
+    the window rather than the scene.
+    """
+
+    def __init__(self, image, bounds, band_names, scale_m=10, block_size=PIXEL_BLOCK_SIZE,
+                 workers=PIXEL_WORKERS, scale=None):
+        """
+        Args:
+            image: ee.Image holding band_names
+            bounds: [min_lon, min_lat, max_lon, max_lat]
+            band_names: Bands fed to the engine, in order
+            scale_m: Pixel size in meters
+            block_size: Side of each computePixels request in pixels
+            workers: Requests in flight at once
+            scale: Native value mapped to 1.0 (defaults by dtype)
+        """
+        self.image = image
+        self.band_names = list(band_names)
+        self.bands = len(self.band_names)
+        self.transform, self.height, self.width = region_grid(bounds, scale_m)
+        self.crs = 'EPSG:4326'
+        self.block_size = block_size
+        self.blocks = plan_pieces(self.height, self.width, block_size)
+        self.blocks_per_row = math.ceil(self.width / block_size)
+        self.block_rows = math.ceil(self.height / block_size)
+        self.workers = workers
+        # Block rows requested ahead of the current one: enough to keep every worker busy,
+        # and at least two so a tile straddling a block seam never waits on an unsubmitted row
+        self.rows_ahead = max(2, math.ceil(workers / self.blocks_per_row))
+        self.submitted_rows = 0
+        self.released_rows = 0
+        self.scale = float(scale) if scale else None
+        self.pool = None
+        self.futures = None
+
+    @property
+    def shape(self):
+        return self.height, self.width
+
+    @property
+    def geotransform(self):
+        """GDAL-style (x0, dx, rx, y0, ry, dy) geotransform"""
+        return self.transform.to_gdal()
+
+    def start(self):
+        """Submit the first window of block rows (idempotent)"""
+        if self.futures is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ee-pixels')
+            self.futures = [None] * len(self.blocks)
+            self._advance(0)
+        return self
+
+    def _advance(self, block_row):
+        """Drop block rows above block_row and submit rows up to rows_ahead below it"""
+        for row in range(self.released_rows, min(block_row, self.submitted_rows)):
+            for index in range(row * self.blocks_per_row, (row + 1) * self.blocks_per_row):
+                if self.futures[index] is not None:
+                    self.futures[index].cancel()
+                    self.futures[index] = None
+        self.released_rows = max(self.released_rows, block_row)
+        self.submitted_rows = max(self.submitted_rows, block_row)
+        self._submit_to(block_row + self.rows_ahead)
+
+    def _submit_to(self, end_row):
+        """Submit every block row before end_row that is not in flight yet"""
+        end_row = min(end_row, self.block_rows)
+        for row in range(self.submitted_rows, end_row):
+            for index in range(row * self.blocks_per_row, (row + 1) * self.blocks_per_row):
+                self.futures[index] = self.pool.submit(self.fetch_block, self.blocks[index])
+        self.submitted_rows = max(self.submitted_rows, end_row)
+
+    def fetch_block(self, block):
+        """Fetch one (row, col, height, width) block as a [C, h, w] array in the image's native dtype"""
+        row, col, height, width = block
+        x0, y0 = self.transform * (col, row)
+        request = {
+            'expression': self.image,
+            'fileFormat': 'NUMPY_NDARRAY',
+            'bandIds': self.band_names,
+            'grid': {
+                'dimensions': {'width': width, 'height': height},
+                'affineTransform': {
+                    'scaleX': self.transform.a,
+                    'shearX': self.transform.b,
+                    'translateX': x0,
+                    'shearY': self.transform.d,
+                    'scaleY': self.transform.e,
+                    'translateY': y0
+                },
+                'crsCode': self.crs
+            }
+        }
+        pixels = default_transport().call(ee.data.computePixels, 'ee:computePixels', request)
+        # Structured [h, w] array with one field per band
+        data = np.stack([pixels[name] for name in self.band_names])
+        if data.shape[1:] != (height, width):
+            raise RuntimeError(f"block {block} returned {data.shape[1:]}")
+        return data
+
+    def read_window(self, y, x, height, width):
+        """
+        Assemble a [C, h, w] window in native dtype from the blocks under it
+
+        Windows must come in top-to-bottom order (the engine's row-major tile
+        order): block rows above y are released once a window starts below them.
+        """
+        self.start()
+        size = self.block_size
+        first_row, last_row = y // size, (y + height - 1) // size
+        if first_row < self.released_rows:
+            raise ValueError(f"window at row {y} is above the released blocks (read windows top to bottom)")
+        self._advance(first_row)
+        # A window taller than the look-ahead needs the rest of its rows now
+        self._submit_to(last_row + 1)
+        window = None
+        for block_row in range(first_row, last_row + 1):
+            for block_col in range(x // size, (x + width - 1) // size + 1):
+                data = self.futures[block_row * self.blocks_per_row + block_col].result()
+                if window is None:
+                    window = np.empty((self.bands, height, width), dtype=data.dtype)
+                top, left = block_row * size, block_col * size
+                y0, y1 = max(y, top), min(y + height, top + data.shape[1])
+                x0, x1 = max(x, left), min(x + width, left + data.shape[2])
+                window[:, y0 - y:y1 - y, x0 - x:x1 - x] = data[:, y0 - top:y1 - top, x0 - left:x1 - left]
+        return window
+
+    def read_tile(self, tile):
+        """Read one tile as normalized float32 [C, h, w]"""
+        raw = self.read_window(tile.y, tile.x, tile.height, tile.width)
+        scale = self.scale or DTYPE_SCALES.get(raw.dtype.name, 1.0)
+        block = raw.astype(np.float32)
+        block *= 1.0 / scale
+        return np.clip(block, 0.0, 1.0, out=block)
+
+    def close(self):
+        if self.pool is not None:
+            for future in self.futures:
+                if future is not None:
+                    future.cancel()
+            self.pool.shutdown(wait=True)
+            self.pool = None
+            self.futures = None
+            self.submitted_rows = self.released_rows = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
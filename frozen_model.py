@@ -0,0 +1,152 @@
+"""
+🧊 Frozen U-Net Export
+Folds each BatchNorm2d into its preceding Conv2d and writes a startup-friendly inference artifact
+"""
+
+import argparse
+import time
+import zipfile
+from pathlib import Path
+
+# torch is imported by the functions that use it, so the detector can read
+# FROZEN_MODEL_PATH on the ONNX Runtime backend without loading it
+
+FROZEN_MODEL_PATH = "models/unet_folded.pt"
+
+# Archive marker for folded state-dict artifacts
+FOLDED_FORMAT = 'unet-folded-v1'
+
+
+# ========================================
+# Conv + BatchNorm Folding
+# ========================================
+
+def _conv_bn_pairs(model):
+    import torch.nn as nn
+
+    for block in list(model.modules()):
+        if not isinstance(block, nn.Sequential):
+            continue
+        for i in range(len(block) - 1):
+            if isinstance(block[i], nn.Conv2d) and isinstance(block[i + 1], nn.BatchNorm2d):
+                yield block, i
+
+
+def fold_batchnorm(model):
+    """
+    Fold every Conv2d -> BatchNorm2d pair into a single Conv2d (in place)
+
+    The BatchNorm slot is replaced with nn.Identity so state-dict keys of
+    the remaining layers keep their positions.
+    """
+    import torch.nn as nn
+    from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+    model.eval()
+    for block, i in _conv_bn_pairs(model):
+        block[i] = fuse_conv_bn_eval(block[i], block[i + 1])
+        block[i + 1] = nn.Identity()
+    return model
+
+
+def strip_batchnorm(model):
+    """Replace BatchNorm layers with nn.Identity, giving the folded architecture"""
+    import torch.nn as nn
+
+    for block, i in _conv_bn_pairs(model):
+        block[i + 1] = nn.Identity()
+    return model
+
+
+# ========================================
+# Export / Load
+# ========================================
+
+def export_folded(model, path, in_channels=3, out_channels=1):
+    """Save folded weights as an uncompressed torch archive that can be memory-mapped on load"""
+    import torch
+
+    torch.save({
+        'format': FOLDED_FORMAT,
+        'in_channels': in_channels,
+        'out_channels': out_channels,
+        'state_dict': fold_batchnorm(model).state_dict()
+    }, path)
+
+
+def export_torchscript(model, path):
+    """Save a frozen TorchScript module with BatchNorm already folded"""
+    import torch
+
+    scripted = torch.jit.script(fold_batchnorm(model))
+    torch.jit.save(torch.jit.freeze(scripted), path)
+
+
+def is_torchscript_archive(path):
+    with zipfile.ZipFile(path) as archive:
+        return any('/code/' in name for name in archive.namelist())
+
+
+def load_frozen(path, model_factory, device='cpu'):
+    """
+    Load a frozen artifact written by export_folded or export_torchscript
+
+    Folded archives are memory-mapped: the BN-free U-Net is built on the
+    meta device and its parameters are assigned straight from the mapped
+    file, so no weight initialization or copy happens.
+
+    Args:
+        path: Artifact path
+        model_factory: Callable(in_channels, out_channels) -> UNet
+        device: Target device
+
+    Returns:
+        Eval-mode model
+    """
+    import torch
+
+    if is_torchscript_archive(path):
+        return torch.jit.load(path, map_location=device).eval()
+
+    artifact = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    if artifact.get('format') != FOLDED_FORMAT:
+        raise ValueError(f"{path} is not a folded U-Net artifact")
+
+    with torch.device('meta'):
+        model = strip_batchnorm(model_factory(artifact['in_channels'], artifact['out_channels']))
+    model.load_state_dict(artifact['state_dict'], assign=True)
+
+    return model.to(device).eval()
+
+
+def main():
+    import torch
+
+    from automated_inference import MODEL_PATH
+    from unet import UNet
+
+    parser = argparse.ArgumentParser(description='Export a BatchNorm-folded U-Net inference artifact')
+    parser.add_argument('--model', default=MODEL_PATH, help='Trained U-Net state dict')
+    parser.add_argument('--output', default=FROZEN_MODEL_PATH, help='Artifact path')
+    parser.add_argument('--format', choices=['folded', 'torchscript'], default='folded',
+                       help='folded: memory-mappable weights for the detector; torchscript: frozen graph')
+    args = parser.parse_args()
+
+    model = UNet(in_channels=3, out_channels=1)
+    model.load_state_dict(torch.load(args.model, map_location='cpu'))
+    model.eval()
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    if args.format == 'torchscript':
+        export_torchscript(model, args.output)
+    else:
+        export_folded(model, args.output)
+    print(f"✅ Exported {args.format} artifact to {args.output}")
+
+    start = time.perf_counter()
+    load_frozen(args.output, UNet)
+    print(f"⏱️  Reload time: {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,21 +6,20 @@ Automatically downloads latest Sentinel-2 imagery for Chingola mining area
 import ee
 import geemap
 import datetime
-import os
+import sys
 from pathlib import Path
 
+# AOIs are shared with the detector through the registry in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from aoi_registry import get_aoi, aoi_polygon, default_aoi_id
+from ee_batch import evaluate, sentinel2_collection
+
 # ============================================
 # CONFIGURATION
 # ============================================
 
-# Area of Interest (Chingola, Zambia)
-AOI = ee.Geometry.Polygon([
-    [27.7, -12.6],
-    [28.2, -12.6],
-    [28.2, -12.4],
-    [27.7, -12.4],
-    [27.7, -12.6]
-])
+# Area of Interest (default: Chingola district; set AOI_ID to pick another from aois.json)
+AOI = ee.Geometry.Polygon(aoi_polygon(get_aoi(default_aoi_id('chingola_district'))))
 
 # Date ranges
 END_DATE = datetime.datetime.now()
@@ -49,7 +48,11 @@ def initialize_ee():
 # FETCH SENTINEL-2 DATA
 # ============================================
 
-def get_sentinel2_composite(aoi, start_date, end_date):
+def get_sentinel2_collection(aoi, start_date, end_date):
+    """Low-cloud Sentinel-2 collection over the area between two dates"""
+    return sentinel2_collection(aoi, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+
+def get_sentinel2_composite(aoi, start_date, end_date, count=None):
     """
     Get cloud-free Sentinel-2 composite for the area
     
@@ -57,6 +60,7 @@ def get_sentinel2_composite(aoi, start_date, end_date):
         aoi: Earth Engine geometry
         start_date: Start date (datetime)
         end_date: End date (datetime)
+        count: Image count if already known (see main, which counts both periods at once)
     
     Returns:
         Earth Engine image composite
@@ -64,13 +68,11 @@ def get_sentinel2_composite(aoi, start_date, end_date):
     print(f"\n📡 Fetching Sentinel-2 data from {start_date.date()} to {end_date.date()}")
     
     # Load Sentinel-2 collection
-    s2 = ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED') \
-        .filterBounds(aoi) \
-        .filterDate(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')) \
-        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
+    s2 = get_sentinel2_collection(aoi, start_date, end_date)
     
     # Check if images are available
-    count = s2.size().getInfo()
+    if count is None:
+        count = evaluate({'count': s2.size()})['count']
     print(f"   Found {count} images")
     
     if count == 0:
@@ -258,8 +260,14 @@ def main():
     print("FETCHING SATELLITE IMAGERY")
     print("=" * 60)
     
-    before_composite = get_sentinel2_composite(AOI, before_start, before_end)
-    after_composite = get_sentinel2_composite(AOI, after_start, after_end)
+    # Both periods' image counts in one round-trip
+    counts = evaluate({
+        'before': get_sentinel2_collection(AOI, before_start, before_end).size(),
+        'after': get_sentinel2_collection(AOI, after_start, after_end).size()
+    })
+    
+    before_composite = get_sentinel2_composite(AOI, before_start, before_end, counts['before'])
+    after_composite = get_sentinel2_composite(AOI, after_start, after_end, counts['after'])
     
     if before_composite is None or after_composite is None:
         print("\n❌ Failed to fetch imagery")
@@ -8,6 +8,14 @@ import os
 import sys
 import json
 from datetime import datetime, timedelta
+from pathlib import Path
+
+# AOIs are shared with the detector through the registry in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from aoi_registry import get_aoi, aoi_polygon, default_aoi_id
+from http_transport import default_transport, supabase_client
+from supabase_writer import IDEMPOTENCY_COLUMN, idempotency_key, upsert_rows
+from ee_batch import evaluate
 
 def initialize_earth_engine():
     """Initialize Earth Engine with GitHub Actions authentication"""
@@ -100,8 +108,12 @@ def fetch_latest_imagery(aoi_coords, days_back=30):
         .filterDate(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
         .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)))
     
-    # Check image count
-    count = collection.size().getInfo()
+    # Image count and cloud cover in one round-trip
+    stats = evaluate({
+        'count': collection.size(),
+        'cloud_pct': collection.aggregate_array('CLOUDY_PIXEL_PERCENTAGE')
+    })
+    count = stats['count']
     print(f"   Found: {count} images")
     
     if count == 0:
@@ -120,7 +132,8 @@ def fetch_latest_imagery(aoi_coords, days_back=30):
         'start_date': start_date.isoformat(),
         'end_date': end_date.isoformat(),
         'satellite': 'Sentinel-2',
-        'cloud_threshold': 20
+        'cloud_threshold': 20,
+        'cloud_pct': sum(stats['cloud_pct']) / count
     }
     
     print("✅ Imagery fetched successfully")
@@ -142,7 +155,7 @@ def get_download_url(image, name, aoi_coords, scale=30):  # Changed from scale=1
     aoi = ee.Geometry.Polygon([aoi_coords])
     
     try:
-        url = image.getDownloadURL({
+        url = default_transport().call(image.getDownloadURL, 'ee:getDownloadURL', {
             'name': name,
             'scale': scale,
             'region': aoi,
@@ -165,8 +178,6 @@ def upload_to_supabase(metadata):
     Returns:
         Database record ID or None
     """
-    from supabase import create_client
-    
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_KEY')
     
@@ -178,10 +189,11 @@ def upload_to_supabase(metadata):
     print("\n💾 Uploading to Supabase...")
     
     try:
-        supabase = create_client(supabase_url, supabase_key)
+        supabase = supabase_client(supabase_url, supabase_key)
         
-        # Insert record
-        response = supabase.table('satellite_updates').insert({
+        # Upsert record: one per AOI and collection day, so a re-run workflow does not duplicate it
+        response = upsert_rows(supabase, 'satellite_updates', [{
+            IDEMPOTENCY_COLUMN: idempotency_key('satellite_updates', metadata['aoi_id'], metadata['end_date'][:10]),
             'collection_date': metadata['end_date'],
             'satellite': metadata['satellite'],
             'cloud_percentage': metadata.get('cloud_pct', 0),
@@ -190,7 +202,7 @@ def upload_to_supabase(metadata):
             'ndvi_url': metadata.get('ndvi_url'),
             'status': 'completed',
             'notes': f"Automated collection: {metadata['image_count']} images from {metadata['start_date'][:10]} to {metadata['end_date'][:10]}"
-        }).execute()
+        }])
         
         if response.data:
             record_id = response.data[0]['id']
@@ -212,14 +224,10 @@ def main():
     print(f"⏰ Run time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
     print()
     
-    # Area of Interest (Chingola, Zambia) - Reduced size to stay under 50MB limit
-    AOI_COORDS = [
-        [27.82, -12.52],
-        [27.88, -12.52],
-        [27.88, -12.48],
-        [27.82, -12.48],
-        [27.82, -12.52]
-    ]
+    # Area of Interest (default: Chingola, reduced size to stay under the 50MB limit;
+    # set AOI_ID to pick another from aois.json)
+    aoi = get_aoi(default_aoi_id('chingola'))
+    AOI_COORDS = aoi_polygon(aoi)
     
     # Step 1: Initialize Earth Engine
     if not initialize_earth_engine():
@@ -232,12 +240,14 @@ def main():
         print("\n❌ No imagery available")
         sys.exit(0)  # Exit gracefully (not an error)
     
+    metadata['aoi_id'] = aoi['id']
+    
     # Step 3: Generate download URLs
     print("\n🔗 Generating download URLs...")
     
     rgb = composite.select(['B4', 'B3', 'B2'])
-    rgb_url = get_download_url(rgb, 'chingola_rgb', AOI_COORDS)
-    ndvi_url = get_download_url(ndvi, 'chingola_ndvi', AOI_COORDS)
+    rgb_url = get_download_url(rgb, f"{aoi['id']}_rgb", AOI_COORDS)
+    ndvi_url = get_download_url(ndvi, f"{aoi['id']}_ndvi", AOI_COORDS)
     
     if rgb_url:
         print(f"   ✓ RGB URL: {rgb_url[:80]}...")
@@ -50,6 +50,83 @@ COMMENT ON COLUMN satellite_updates.collection_date IS 'When the satellite data
 COMMENT ON COLUMN satellite_updates.download_url IS 'Direct download URL for the satellite image (GeoTIFF)';
 COMMENT ON COLUMN satellite_updates.ndvi_url IS 'Direct download URL for NDVI calculation (GeoTIFF)';
 
+-- ============================================================
+-- Multi-AOI Support (aoi_registry.py / aoi_scheduler.py)
+-- ============================================================
+
+-- Registry of monitored areas (alternative to aois.json; keep the seed rows in sync with it)
+CREATE TABLE IF NOT EXISTS aois (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL,
+  bounds DOUBLE PRECISION[] NOT NULL,  -- [min_lon, min_lat, max_lon, max_lat]
+  latitude DOUBLE PRECISION,
+  longitude DOUBLE PRECISION,
+  enabled BOOLEAN DEFAULT TRUE,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+INSERT INTO aois (id, name, bounds, latitude, longitude)
+VALUES
+  ('chingola', 'Chingola, Zambia', ARRAY[27.82, -12.52, 27.88, -12.48], -12.5, 27.85),
+  ('chingola_district', 'Chingola District, Zambia', ARRAY[27.7, -12.6, 28.2, -12.4], -12.5, 27.95)
+ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE aois ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access" ON aois;
+CREATE POLICY "Allow public read access"
+  ON aois FOR SELECT
+  USING (true);
+
+-- Predictions and alerts are kept per AOI; existing rows belong to Chingola
+ALTER TABLE mining_predictions ADD COLUMN IF NOT EXISTS aoi_id TEXT DEFAULT 'chingola';
+ALTER TABLE mining_alerts ADD COLUMN IF NOT EXISTS aoi_id TEXT DEFAULT 'chingola';
+
+CREATE INDEX IF NOT EXISTS idx_mining_predictions_aoi_date
+  ON mining_predictions(aoi_id, prediction_date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_mining_alerts_aoi
+  ON mining_alerts(aoi_id);
+
+COMMENT ON TABLE aois IS 'Areas of interest monitored by the mining detector';
+COMMENT ON COLUMN mining_predictions.aoi_id IS 'AOI the prediction was made for (aois.id)';
+
+-- ============================================================
+-- Idempotent Writes (supabase_writer.py)
+-- ============================================================
+
+-- Rows are upserted ON CONFLICT (idempotency_key), so a retried or re-run
+-- write updates its row instead of adding a duplicate. Older rows keep a
+-- NULL key (NULLs never conflict with each other).
+ALTER TABLE mining_predictions ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+ALTER TABLE mining_alerts ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+ALTER TABLE satellite_updates ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mining_predictions_idempotency
+  ON mining_predictions(idempotency_key);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mining_alerts_idempotency
+  ON mining_alerts(idempotency_key);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_satellite_updates_idempotency
+  ON satellite_updates(idempotency_key);
+
+-- ON CONFLICT DO UPDATE needs an UPDATE policy under row level security
+-- (satellite_updates already has one above)
+DROP POLICY IF EXISTS "Allow authenticated updates" ON mining_predictions;
+CREATE POLICY "Allow authenticated updates" 
+  ON mining_predictions FOR UPDATE 
+  USING (true);
+
+DROP POLICY IF EXISTS "Allow authenticated updates" ON mining_alerts;
+CREATE POLICY "Allow authenticated updates" 
+  ON mining_alerts FOR UPDATE 
+  USING (true);
+
+-- Alerts are written without a status, so a re-run upsert never marks a
+-- read alert unread again; new alerts start unread from the default
+ALTER TABLE mining_alerts ALTER COLUMN status SET DEFAULT 'unread';
+
 -- ============================================================
 -- Verification Queries
 -- ============================================================
@@ -0,0 +1,263 @@
+"""
+🌐 Shared HTTP Transport
+Pooled keep-alive sessions, bounded concurrency and jittered exponential backoff
+(honouring Retry-After on 429/503) for GEE downloads and Supabase calls, with
+per-endpoint latency and retry counters
+"""
+
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx  # Used by the Supabase client
+except ImportError:
+    httpx = None
+
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+MAX_CONCURRENCY = 16
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 60.0
+REQUEST_TIMEOUT_SECONDS = 300
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+if httpx is not None:
+    TRANSIENT_ERRORS += (httpx.TransportError,)
+
+# Earth Engine reports throttling and outages only in the exception message
+TRANSIENT_MESSAGES = ('too many requests', 'rate limit', 'quota exceeded', 'service unavailable',
+                      'too many concurrent', 'deadline exceeded')
+
+# A 429/503 status quoted in a message ("HttpError 429", "status: 503", "code=429"),
+# not the same digits inside an asset id or date such as 20240429T...
+TRANSIENT_STATUS_PATTERN = re.compile(r'(?:status|code|error)\W{0,3}(?:429|503)\b')
+
+
+def status_of(error):
+    """HTTP status carried by an exception (requests/httpx response or PostgREST code), if any"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'code', None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(error):
+    """Whether an exception is worth retrying"""
+    if isinstance(error, TRANSIENT_ERRORS) or status_of(error) in RETRY_STATUSES:
+        return True
+    message = str(error).lower()
+    return (any(marker in message for marker in TRANSIENT_MESSAGES)
+            or TRANSIENT_STATUS_PATTERN.search(message) is not None)
+
+
+def retry_after_seconds(headers):
+    """Delay requested by a Retry-After header (seconds or HTTP date), or None"""
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def endpoint_of(url):
+    """Stats label for a URL: host plus first path segment"""
+    parsed = urlparse(url)
+    segment = parsed.path.strip('/').split('/', 1)[0]
+    return f"{parsed.netloc}/{segment}" if segment else parsed.netloc
+
+
+class EndpointStats:
+    """Call, retry and latency counters for one endpoint"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'retries': self.retries,
+            'mean_seconds': self.total_seconds / self.calls if self.calls else 0.0,
+            'max_seconds': self.max_seconds
+        }
+
+
+class HttpTransport:
+    """
+    Retrying, connection-pooled HTTP client shared by every caller in a process
+
+    request()/get() mirror requests.Session, so the transport can be passed
+    wherever a session is expected. call() applies the same backoff and
+    accounting to any client call (Earth Engine getInfo, Supabase execute).
+    A semaphore bounds how many calls are in flight at once; a stream=True
+    response keeps its slot until it is closed, so body downloads count
+    too (use it as a context manager, as scene_cache and split_download do).
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE_SECONDS, backoff_max=BACKOFF_MAX_SECONDS,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential delay, or the server's Retry-After when it asks for longer"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def call(self, fn, endpoint, *args, **kwargs):
+        """Call fn with retries on transient errors, recording stats under endpoint"""
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                with self.semaphore:
+                    result = fn(*args, **kwargs)
+                self._record(endpoint, time.perf_counter() - start)
+                return result
+            except Exception as e:
+                self._record(endpoint, time.perf_counter() - start, failed=True)
+                if attempt == self.max_retries or not is_transient(e):
+                    raise
+                headers = getattr(getattr(e, 'response', None), 'headers', None)
+                self._sleep(endpoint, self.backoff(attempt, retry_after_seconds(headers)))
+
+    def request(self, method, url, endpoint=None, **kwargs):
+        """requests.Session.request with retries on connection errors and 429/5xx responses"""
+        endpoint = endpoint or endpoint_of(url)
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT_SECONDS)
+
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            self.semaphore.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except TRANSIENT_ERRORS:
+                self.semaphore.release()
+                self._record(endpoint, time.perf_counter() - start, failed=True)
+                if attempt == self.max_retries:
+                    raise
+                self._sleep(endpoint, self.backoff(attempt))
+                continue
+            except BaseException:
+                self.semaphore.release()
+                raise
+
+            elapsed = time.perf_counter() - start
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self.semaphore.release()
+                self._record(endpoint, elapsed, failed=True)
+                delay = self.backoff(attempt, retry_after_seconds(response.headers))
+                response.close()
+                self._sleep(endpoint, delay)
+                continue
+
+            self._record(endpoint, elapsed, failed=response.status_code >= 400)
+            if kwargs.get('stream'):
+                self._hold_until_closed(response)
+            else:
+                self.semaphore.release()
+            return response
+
+    def _hold_until_closed(self, response):
+        """Release the response's semaphore slot when it is closed (once, however often close is called)"""
+        close = response.close
+        released = threading.Lock()
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                if released.acquire(blocking=False):
+                    self.semaphore.release()
+
+        response.close = close_and_release
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def _sleep(self, endpoint, delay):
+        with self.stats_lock:
+            self.stats.setdefault(endpoint, EndpointStats()).retries += 1
+        time.sleep(delay)
+
+    def _record(self, endpoint, seconds, failed=False):
+        with self.stats_lock:
+            stats = self.stats.setdefault(endpoint, EndpointStats())
+            stats.calls += 1
+            stats.failures += int(failed)
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def report(self):
+        with self.stats_lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self.stats.items())}
+
+    def summary(self):
+        lines = ["🌐 HTTP endpoints:"]
+        for endpoint, stats in self.report().items():
+            lines.append(f"   {endpoint:<40} {stats['calls']:5d} calls, {stats['retries']} retries, "
+                         f"{stats['failures']} failed, {stats['mean_seconds']:.2f}s mean, {stats['max_seconds']:.2f}s max")
+        return "\n".join(lines)
+
+
+_transport = None
+_supabase_clients = {}
+_shared_lock = threading.Lock()
+
+
+def default_transport():
+    """Process-wide shared transport"""
+    global _transport
+    with _shared_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
+
+
+def supabase_client(url, key):
+    """Process-wide Supabase client per (url, key), so its connection pool is reused"""
+    with _shared_lock:
+        if (url, key) not in _supabase_clients:
+            from supabase import create_client
+            _supabase_clients[(url, key)] = create_client(url, key)
+        return _supabase_clients[(url, key)]
+
+
+def execute(query, endpoint):
+    """Run a Supabase query builder's execute() through the shared transport's retries"""
+    return default_transport().call(query.execute, endpoint)
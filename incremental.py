@@ -0,0 +1,211 @@
+"""
+♻️ Incremental Tile Inference
+Keeps each AOI's tile fingerprints and tile predictions so the next scene only
+re-runs the U-Net on tiles whose input actually changed
+"""
+
+import json
+import os
+import re
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs sharing a state directory are not serialized
+    fcntl = None
+
+STATE_DIR = "state"
+
+# Side length of the block-mean thumbnail used as a tile fingerprint
+FINGERPRINT_SIZE = 16
+
+# Mean absolute fingerprint difference (normalized reflectance) above which a tile is recomputed
+TILE_CHANGE_THRESHOLD = 0.02
+
+# Channels fingerprinted (the model's RGB input)
+FINGERPRINT_BANDS = 3
+
+
+def aoi_key(name):
+    """Filesystem-safe key for an AOI name, e.g. 'Chingola, Zambia' -> 'chingola_zambia'"""
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def tile_fingerprint(data, size=FINGERPRINT_SIZE):
+    """Block-mean thumbnail [C, size, size] of a [C, h, w] tile"""
+    data = data[:FINGERPRINT_BANDS]
+    rows = np.linspace(0, data.shape[1], size + 1).astype(int)
+    cols = np.linspace(0, data.shape[2], size + 1).astype(int)
+    row_starts = np.minimum(rows[:-1], data.shape[1] - 1)
+    col_starts = np.minimum(cols[:-1], data.shape[2] - 1)
+
+    sums = np.add.reduceat(np.add.reduceat(data, row_starts, axis=1), col_starts, axis=2)
+    counts = np.outer(np.maximum(np.diff(rows), 1), np.maximum(np.diff(cols), 1))
+    return (sums / counts).astype(np.float32)
+
+
+class IncrementalTileState:
+    """
+    Tile filter that reuses the previous scene's tile predictions
+
+    State for one AOI lives in a directory: meta.json plus one generation
+    of fingerprint / probability / validity arrays. A tile is reused when
+    its fingerprint is within the threshold of the fingerprint its stored
+    prediction was made from. Reused tiles keep that original fingerprint,
+    so slow drift still triggers a recompute eventually.
+
+    A run writes a new generation and switches meta.json to it atomically
+    in finish(), so an interrupted run leaves the previous state intact.
+    Each run holds an exclusive lock on <state_dir>/.lock from begin() to
+    finish() (or abort()), so processes sharing an AOI's state (a daemon
+    next to a cron run) take turns instead of deleting each other's
+    in-flight generation; any generation meta.json does not point to is
+    then known to be left over from a dead run.
+    """
+
+    name = 'incremental'
+
+    def __init__(self, state_dir, model_version, threshold=TILE_CHANGE_THRESHOLD):
+        self.state_dir = Path(state_dir)
+        self.model_version = model_version
+        self.threshold = threshold
+        self.reused = 0
+        self.recomputed = 0
+        self.lock_file = None
+
+    @property
+    def meta_path(self):
+        return self.state_dir / 'meta.json'
+
+    def _grid_meta(self, grid):
+        return {
+            'height': grid.height,
+            'width': grid.width,
+            'tile_size': grid.tile_size,
+            'overlap': grid.overlap,
+            'fingerprint_size': FINGERPRINT_SIZE,
+            'model_version': self.model_version
+        }
+
+    def begin(self, grid):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._lock()
+        self.grid_meta = self._grid_meta(grid)
+        self.reused = 0
+        self.recomputed = 0
+        self.pending = {}
+
+        self.previous = self._load_previous()
+        self._remove_orphans()
+
+        # New generation, filled as tiles are reused or predicted
+        self.generation = uuid.uuid4().hex[:12]
+        n_tiles = len(grid)
+        shape = (n_tiles, FINGERPRINT_BANDS, FINGERPRINT_SIZE, FINGERPRINT_SIZE)
+        self.fingerprints = np.zeros(shape, dtype=np.float32)
+        self.valid = np.zeros(n_tiles, dtype=bool)
+        self.probs = np.lib.format.open_memmap(
+            self._path('probs', self.generation), mode='w+', dtype=np.float16,
+            shape=(n_tiles, grid.tile_size, grid.tile_size)
+        )
+
+    def _lock(self):
+        self.lock_file = open(self.state_dir / '.lock', 'w')
+        if fcntl is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+
+    def _unlock(self):
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+    def _path(self, kind, generation):
+        return self.state_dir / f'{kind}-{generation}.npy'
+
+    def _load_previous(self):
+        """Previous generation's arrays, or None if missing or made for another grid/model"""
+        if not self.meta_path.exists():
+            return None
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        if meta.get('grid') != self.grid_meta:
+            print("ℹ️ Incremental state is for a different grid or model - recomputing all tiles")
+            return None
+
+        generation = meta['generation']
+        return {
+            'generation': generation,
+            'fingerprints': np.load(self._path('fingerprints', generation)),
+            'valid': np.load(self._path('valid', generation)),
+            'probs': np.load(self._path('probs', generation), mmap_mode='r')
+        }
+
+    def _remove_orphans(self):
+        """Delete generations left behind by interrupted runs (safe: we hold the state lock)"""
+        keep = self.previous['generation'] if self.previous else None
+        for path in self.state_dir.glob('*-*.npy'):
+            if not path.stem.endswith(f'-{keep}'):
+                path.unlink(missing_ok=True)
+
+    def lookup(self, tile, data):
+        fingerprint = tile_fingerprint(data)
+        previous = self.previous
+
+        if previous is not None and previous['valid'][tile.index]:
+            reference = previous['fingerprints'][tile.index]
+            if float(np.abs(fingerprint - reference).mean()) <= self.threshold:
+                prob = np.asarray(previous['probs'][tile.index, :tile.height, :tile.width], dtype=np.float32)
+                self.fingerprints[tile.index] = reference
+                self.probs[tile.index, :tile.height, :tile.width] = prob
+                self.valid[tile.index] = True
+                self.reused += 1
+                return prob
+
+        self.pending[tile.index] = fingerprint
+        return None
+
+    def store(self, tile, prob):
+        fingerprint = self.pending.pop(tile.index, None)
+        if fingerprint is None:
+            return
+        self.fingerprints[tile.index] = fingerprint
+        self.probs[tile.index, :tile.height, :tile.width] = prob
+        self.valid[tile.index] = True
+        self.recomputed += 1
+
+    def finish(self):
+        """Commit this run's generation and drop the previous one"""
+        self.probs.flush()
+        del self.probs
+        np.save(self._path('fingerprints', self.generation), self.fingerprints)
+        np.save(self._path('valid', self.generation), self.valid)
+
+        tmp_path = self.meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'generation': self.generation, 'grid': self.grid_meta}, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+        if self.previous is not None:
+            old = self.previous['generation']
+            self.previous = None
+            for kind in ('probs', 'fingerprints', 'valid'):
+                self._path(kind, old).unlink(missing_ok=True)
+        self._unlock()
+
+    def abort(self):
+        """Drop this run's unfinished generation and release the state lock"""
+        if self.lock_file is None:
+            return
+        self.probs = None
+        self.previous = None
+        for kind in ('probs', 'fingerprints', 'valid'):
+            self._path(kind, self.generation).unlink(missing_ok=True)
+        self._unlock()
+
+    def summary(self):
+        total = self.reused + self.recomputed
+        share = self.reused / total if total else 0.0
+        return f"Incremental: reused {self.reused}/{total} tiles ({share:.0%}), recomputed {self.recomputed}"
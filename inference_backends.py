@@ -0,0 +1,185 @@
+"""
+🔌 Inference Backends
+Pluggable U-Net executors for the tiled engine: PyTorch eager and ONNX Runtime (CPU)
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+# torch is imported inside the torch-only code paths, so ONNX Runtime runs never load it
+
+ONNX_MODEL_PATH = "models/unet.onnx"
+
+BACKENDS = ['torch', 'onnx']
+DEFAULT_BACKEND = 'torch'
+
+# ONNX output must stay within this absolute probability difference of PyTorch;
+# masks can then only differ on pixels whose probability is within it of the threshold
+PARITY_TOLERANCE = 1e-4
+
+
+# ========================================
+# Backends
+# ========================================
+
+class TorchBackend:
+    """Runs batches through an eval-mode PyTorch module, optionally via an inference profile"""
+
+    name = 'torch'
+
+    def __init__(self, model, device='cpu', profile=None, prepared=False):
+        """
+        Args:
+            model: Eval-mode U-Net
+            profile: Optional InferenceProfile; the model is converted for it
+                     here, at load time (int8 calibrates on its fixed reference set)
+            prepared: model was already converted by profile.prepare_model
+        """
+        self.device = device
+        self.profile = profile
+        self.model = profile.prepare_model(model) if profile is not None and not prepared else model
+
+    def predict_batch(self, batch):
+        """Run one float32 [N, C, T, T] batch, returning [N, T, T] probabilities"""
+        import torch
+
+        tensor = torch.from_numpy(batch).to(self.device)
+
+        if self.profile is None:
+            with torch.no_grad():
+                prediction = self.model(tensor)
+            return prediction[:, 0].cpu().numpy()
+
+        with torch.no_grad(), self.profile.autocast():
+            prediction = self.model(self.profile.prepare_input(tensor))
+
+        return prediction[:, 0].float().cpu().numpy()
+
+
+class OnnxRuntimeBackend:
+    """Runs batches through an exported U-Net with ONNX Runtime's CPU execution provider"""
+
+    name = 'onnx'
+
+    def __init__(self, path, num_threads=None, num_interop_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        if num_interop_threads:
+            options.inter_op_num_threads = num_interop_threads
+
+        self.path = str(path)
+        self.session = ort.InferenceSession(self.path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_batch(self, batch):
+        """Run one float32 [N, C, T, T] batch, returning [N, T, T] probabilities"""
+        prediction = self.session.run(None, {self.input_name: np.ascontiguousarray(batch)})[0]
+        return prediction[:, 0]
+
+
+# ========================================
+# ONNX Export
+# ========================================
+
+def export_onnx(model, path, tile_size=256, opset_version=17):
+    """Export an eval-mode U-Net to ONNX with dynamic batch and spatial axes"""
+    import inspect
+
+    import torch
+
+    example = torch.zeros(1, model.enc1[0].in_channels, tile_size, tile_size)
+    dynamic_axes = {
+        'image': {0: 'batch', 2: 'height', 3: 'width'},
+        'probability': {0: 'batch', 2: 'height', 3: 'width'}
+    }
+
+    # Newer torch defaults to the dynamo exporter; the TorchScript exporter handles dynamic_axes directly
+    extra = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+
+    torch.onnx.export(
+        model.eval(),
+        (example,),
+        str(path),
+        input_names=['image'],
+        output_names=['probability'],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset_version,
+        **extra
+    )
+
+
+# ========================================
+# Parity Check
+# ========================================
+
+def check_parity(reference, candidate, source, tile_size=256, overlap=32, batch_size=8,
+                 tolerance=PARITY_TOLERANCE, threshold=0.5):
+    """
+    Compare two backends over the same scene
+
+    Returns:
+        Dictionary with max probability difference, mask agreement and pass flag
+    """
+    from tiled_inference import TiledInferenceEngine
+
+    probs = []
+    for backend in (reference, candidate):
+        engine = TiledInferenceEngine(backend, tile_size=tile_size, overlap=overlap, batch_size=batch_size)
+        probs.append(engine.predict(source))
+        print(f"   {backend.name}: {engine.last_stats.summary()}")
+
+    max_diff = float(np.abs(probs[0] - probs[1]).max())
+    masks = [prob > threshold for prob in probs]
+
+    return {
+        'max_abs_prob_diff': max_diff,
+        'mask_agreement': float((masks[0] == masks[1]).mean()),
+        'differing_pixels': int((masks[0] != masks[1]).sum()),
+        'tolerance': tolerance,
+        'passed': max_diff <= tolerance
+    }
+
+
+def main():
+    import torch
+
+    from automated_inference import MODEL_PATH
+    from frozen_model import fold_batchnorm
+    from raster_io import GeoTiffReader
+    from unet import UNet
+
+    parser = argparse.ArgumentParser(description='Export the U-Net to ONNX and check parity with PyTorch')
+    parser.add_argument('--model', default=MODEL_PATH, help='Trained U-Net state dict')
+    parser.add_argument('--output', default=ONNX_MODEL_PATH, help='ONNX model path')
+    parser.add_argument('--check', metavar='SCENE', help='GeoTIFF to compare both backends on')
+    parser.add_argument('--tolerance', type=float, default=PARITY_TOLERANCE)
+    args = parser.parse_args()
+
+    model = UNet(in_channels=3, out_channels=1)
+    model.load_state_dict(torch.load(args.model, map_location='cpu'))
+    fold_batchnorm(model)
+
+    export_onnx(model, args.output)
+    print(f"✅ Exported ONNX model to {args.output}")
+
+    if not args.check:
+        return
+
+    print(f"\n🔍 Checking ONNX Runtime against PyTorch on {args.check}")
+    with GeoTiffReader(args.check) as source:
+        result = check_parity(TorchBackend(model), OnnxRuntimeBackend(args.output), source, tolerance=args.tolerance)
+
+    print(f"   Max |Δp|: {result['max_abs_prob_diff']:.2e} (tolerance {result['tolerance']:.0e})")
+    print(f"   Mask agreement: {result['mask_agreement']:.4%} ({result['differing_pixels']} pixels differ)")
+    print("✅ Parity check passed" if result['passed'] else "❌ Parity check failed")
+    sys.exit(0 if result['passed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
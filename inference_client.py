@@ -0,0 +1,70 @@
+"""
+📨 Inference Daemon Client
+Thin client that submits jobs to inference_daemon.py (standard library only, so it starts instantly)
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+DAEMON_URL = os.getenv('MINING_DAEMON_URL', 'http://127.0.0.1:8765')
+
+
+def call_daemon(path, job=None, url=DAEMON_URL, timeout=600):
+    """POST a JSON job (or GET when job is None) and return the decoded response"""
+    data = json.dumps(job).encode('utf-8') if job is not None else None
+    request = urllib.request.Request(
+        url.rstrip('/') + path,
+        data=data,
+        headers={'Content-Type': 'application/json'},
+        method='POST' if data is not None else 'GET'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b'{}') | {'status_code': e.code}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Submit jobs to the mining detection daemon')
+    parser.add_argument('image', nargs='?', help='GeoTIFF to run inference on')
+    parser.add_argument('--array', help='.npy [C, H, W] array to send inline instead of an image path')
+    parser.add_argument('--mask-out', help='Where the daemon should save the mask (.npy)')
+    parser.add_argument('--health', action='store_true', help='Show daemon status')
+    parser.add_argument('--detect', action='store_true', help='Run the full detection pipeline')
+    parser.add_argument('--days-back', type=int, default=30)
+    parser.add_argument('--force-alert', action='store_true')
+    parser.add_argument('--url', default=DAEMON_URL)
+    args = parser.parse_args()
+
+    try:
+        if args.health:
+            result = call_daemon('/health', url=args.url)
+        elif args.detect:
+            result = call_daemon('/detect', {'days_back': args.days_back, 'force_alert': args.force_alert}, url=args.url)
+        elif args.image or args.array:
+            if args.array:
+                with open(args.array, 'rb') as f:
+                    job = {'array': base64.b64encode(f.read()).decode('ascii')}
+            else:
+                job = {'image_path': os.path.abspath(args.image)}
+            if args.mask_out:
+                job['mask_path'] = os.path.abspath(args.mask_out)
+            result = call_daemon('/infer', job, url=args.url)
+        else:
+            parser.error('give an image, --array, --health or --detect')
+    except urllib.error.URLError as e:
+        print(f"❌ Daemon not reachable at {args.url}: {e.reason}")
+        sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if 'error' in result or result.get('success') is False else 0)
+
+
+if __name__ == "__main__":
+    main()
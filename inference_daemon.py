@@ -0,0 +1,213 @@
+"""
+🔥 Warm Inference Daemon
+Long-running detector service that keeps the U-Net and Earth Engine session loaded
+and serves inference jobs over a local HTTP endpoint (see inference_client.py)
+"""
+
+import argparse
+import base64
+import io
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from automated_inference import add_detector_arguments, detector_from_args
+from raster_io import DTYPE_SCALES
+from tiled_inference import ArrayTileSource
+
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 8765
+
+# Largest request body accepted (inline arrays are base64 .npy payloads)
+MAX_REQUEST_BYTES = 512 * 1024 * 1024
+
+
+# ========================================
+# Array Encoding
+# ========================================
+
+def encode_array(array):
+    """Serialize an array as base64 .npy"""
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def decode_array(payload):
+    """Inverse of encode_array"""
+    return np.load(io.BytesIO(base64.b64decode(payload)), allow_pickle=False)
+
+
+def array_source(array):
+    """Tile source for a client-supplied [C, H, W] array (native dtype or normalized float)"""
+    if array.ndim != 3:
+        raise ValueError(f"Expected a [C, H, W] array, got shape {array.shape}")
+    if array.dtype.kind in 'iu':
+        scale = DTYPE_SCALES.get(array.dtype.name, 1.0)
+        array = np.clip(array.astype(np.float32) / scale, 0.0, 1.0)
+    return ArrayTileSource(np.ascontiguousarray(array, dtype=np.float32))
+
+
+# ========================================
+# Detector Service
+# ========================================
+
+class DetectorService:
+    """Wraps one warm MiningDetector; inference jobs run one at a time"""
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.lock = threading.Lock()
+        self.jobs_served = 0
+        self.started = time.time()
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'model_loaded': self.detector.engine is not None,
+            'ee_initialized': self.detector.ee_initialized,
+            'jobs_served': self.jobs_served,
+            'uptime_seconds': time.time() - self.started
+        }
+
+    def infer(self, job):
+        """
+        Run inference for one job
+
+        Args:
+            job: {'image_path': str} or {'array': base64 .npy [C, H, W]},
+                 plus optional 'mask_path' (save mask as .npy) or 'return_mask' (inline)
+
+        Returns:
+            Result dictionary with area and timing
+        """
+        if 'image_path' in job:
+            source, _ = self.detector.preprocess_image(job['image_path'])
+            if source is None:
+                raise ValueError(f"Could not open {job['image_path']}")
+        elif 'array' in job:
+            source = array_source(decode_array(job['array']))
+        else:
+            raise ValueError("Job needs 'image_path' or 'array'")
+
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                mask = self.detector.run_inference(source)
+                stats = self.detector.engine.last_stats
+                # Uses the source's geotransform, recorded by run_inference
+                area_ha = float(self.detector.calculate_area(mask)) if mask is not None else None
+                self.jobs_served += 1
+        finally:
+            if hasattr(source, 'close'):
+                source.close()
+
+        if mask is None:
+            raise RuntimeError("Inference failed")
+
+        result = {
+            'area_ha': area_ha,
+            'mining_pixels': int(mask.sum()),
+            'shape': list(mask.shape),
+            'seconds': time.perf_counter() - start,
+            'stats': stats.as_dict()
+        }
+
+        if job.get('mask_path'):
+            np.save(job['mask_path'], mask)
+            result['mask_path'] = job['mask_path']
+        elif job.get('return_mask'):
+            result['mask'] = encode_array(mask)
+
+        return result
+
+    def detect(self, job):
+        """Run the full detection pipeline with the warm model and EE session"""
+        with self.lock:
+            success = self.detector.run_detection_pipeline(
+                days_back=int(job.get('days_back', 30)),
+                force_alert=bool(job.get('force_alert', False))
+            )
+            self.jobs_served += 1
+        return {'success': success}
+
+
+class DetectorRequestHandler(BaseHTTPRequestHandler):
+    """HTTP routes: GET /health, POST /infer, POST /detect"""
+
+    service = None
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._respond(200, self.service.health())
+        else:
+            self._respond(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        routes = {'/infer': self.service.infer, '/detect': self.service.detect}
+        if self.path not in routes:
+            self._respond(404, {'error': f'Unknown path {self.path}'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_REQUEST_BYTES:
+                self._respond(413, {'error': 'Request too large'})
+                return
+            job = json.loads(self.rfile.read(length) or b'{}')
+            self._respond(200, routes[self.path](job))
+        except (ValueError, KeyError) as e:
+            self._respond(400, {'error': str(e)})
+        except Exception as e:
+            self._respond(500, {'error': str(e)})
+
+    def _respond(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        print(f"   [{self.log_date_time_string()}] {format % args}")
+
+
+# ========================================
+# Main Entry Point
+# ========================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm mining detection daemon')
+    parser.add_argument('--host', default=DAEMON_HOST, help='Bind address (keep local)')
+    parser.add_argument('--port', type=int, default=DAEMON_PORT)
+    parser.add_argument('--no-earth-engine', action='store_true',
+                       help='Skip Earth Engine initialization (inference-only jobs)')
+    add_detector_arguments(parser)
+    args = parser.parse_args()
+
+    detector = detector_from_args(args)
+    if not detector.load_model():
+        sys.exit(1)
+    if not args.no_earth_engine:
+        detector.initialize_earth_engine()
+
+    DetectorRequestHandler.service = DetectorService(detector)
+    server = ThreadingHTTPServer((args.host, args.port), DetectorRequestHandler)
+
+    print(f"🔥 Detector daemon listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+        detector.close()
+
+
+if __name__ == "__main__":
+    main()
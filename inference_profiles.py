@@ -0,0 +1,361 @@
+"""
+⚙️ CPU Inference Profiles
+Selectable U-Net execution profiles (channels_last, bf16 autocast, int8 quantization, thread tuning)
+and an accuracy-vs-latency report against the fp32 baseline
+"""
+
+import argparse
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from tiled_inference import TiledInferenceEngine, TileGrid
+from inference_backends import TorchBackend
+
+# Profile name -> options; see InferenceProfile for their meaning. torch is
+# imported by the functions that use it, so ONNX Runtime runs can read these
+# without loading it (autocast dtypes are named, not torch.dtype objects)
+PROFILE_SPECS = {
+    'fp32': {},
+    'channels_last': {'channels_last': True},
+    'bf16': {'channels_last': True, 'autocast_dtype': 'bfloat16'},
+    'int8': {'quantize': True}
+}
+
+DEFAULT_PROFILE = 'fp32'
+
+# Quantized kernel backend for int8 on x86 CPUs
+QUANTIZED_ENGINE = 'x86'
+
+# Quantized U-Net calibrated offline, written by `inference_profiles.py SCENE --save-int8`
+INT8_MODEL_PATH = "models/unet_int8.pt"
+INT8_FORMAT = 'unet-int8-v1'
+CALIBRATION_TILES = 32
+CALIBRATION_TILE_SIZE = 256
+
+
+# ========================================
+# Thread Configuration
+# ========================================
+
+def configure_threads(intra_op=None, inter_op=None):
+    """
+    Set torch intra-op / inter-op thread pools
+
+    Inter-op threads can only be set before torch starts any parallel work,
+    so a late call keeps the current value and says so.
+    """
+    import torch
+
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            print(f"⚠️  Inter-op threads already fixed at {torch.get_num_interop_threads()}")
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+def cpu_supports_bf16():
+    """True when the CPU has native bf16 instructions (AVX512-BF16 or AMX)"""
+    import torch
+
+    checks = ('_is_avx512_bf16_supported', '_is_amx_tile_supported')
+    return any(getattr(torch.cpu, name, lambda: False)() for name in checks)
+
+
+# ========================================
+# Inference Profiles
+# ========================================
+
+class InferenceProfile:
+    """How the U-Net is prepared and called for inference"""
+
+    def __init__(self, name, channels_last=False, autocast_dtype=None, quantize=False, int8_path=INT8_MODEL_PATH):
+        self.name = name
+        self.channels_last = channels_last
+        self.autocast_dtype = autocast_dtype
+        self.quantize = quantize
+        self.int8_path = int8_path
+
+    def prepare_model(self, model, calibration=None):
+        """
+        Convert an eval-mode model for this profile
+
+        int8 never calibrates on live input: the detector loads the model
+        quantized offline by save_int8() (int8_path), so every worker
+        process and every restart runs the same qparams.
+
+        Args:
+            model: Eval-mode UNet
+            calibration: [N, C, T, T] reference tiles to quantize on instead
+                         (offline use: save_int8, the profile report)
+
+        Returns:
+            Model to run (may be a new module)
+
+        Raises:
+            FileNotFoundError: int8 without calibration tiles or a saved int8 model
+        """
+        import torch
+
+        if self.autocast_dtype == 'bfloat16' and not cpu_supports_bf16():
+            print("⚠️  CPU has no native bf16 support - running bf16 profile in fp32")
+            self.autocast_dtype = None
+
+        if self.quantize:
+            if calibration is not None:
+                model = quantize_int8(model, torch.as_tensor(calibration))
+            else:
+                model = load_int8(model, self.int8_path)
+
+        if self.channels_last:
+            model = model.to(memory_format=torch.channels_last)
+
+        return model
+
+    def prepare_input(self, tensor):
+        import torch
+
+        if self.channels_last:
+            return tensor.contiguous(memory_format=torch.channels_last)
+        return tensor
+
+    def autocast(self):
+        import torch
+
+        if self.autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast('cpu', dtype=getattr(torch, self.autocast_dtype))
+
+
+# ========================================
+# Offline int8 Quantization
+# ========================================
+
+def weights_digest(model):
+    """sha256 of a model's fp32 weights, tying an int8 artifact to the weights it was made from"""
+    digest = hashlib.sha256()
+    for name, tensor in model.state_dict().items():
+        digest.update(name.encode('utf-8'))
+        digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _prepare_int8(model, example):
+    import torch
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx
+
+    if example.device.type != 'cpu':
+        raise ValueError("int8 profile only runs on CPU")
+    torch.backends.quantized.engine = QUANTIZED_ENGINE
+    return prepare_fx(copy.deepcopy(model), get_default_qconfig_mapping(QUANTIZED_ENGINE), example_inputs=(example,))
+
+
+def quantize_int8(model, calibration):
+    """Static post-training int8 quantization, calibrated on reference tiles"""
+    import torch
+    from torch.ao.quantization.quantize_fx import convert_fx
+
+    prepared = _prepare_int8(model, calibration[:1])
+    with torch.no_grad():
+        for start in range(0, len(calibration), 8):
+            prepared(calibration[start:start + 8])
+    return convert_fx(prepared)
+
+
+def calibration_tiles(source, tiles=CALIBRATION_TILES, tile_size=CALIBRATION_TILE_SIZE, bands=3):
+    """Full tiles evenly spread over a reference scene, as a float32 [N, C, T, T] calibration batch"""
+    grid = [tile for tile in TileGrid(source.height, source.width, tile_size, 0)
+            if tile.height == tile_size and tile.width == tile_size]
+    if not grid:
+        raise ValueError(f"reference scene is smaller than one {tile_size}px tile")
+    picks = np.linspace(0, len(grid) - 1, min(tiles, len(grid))).round().astype(int)
+    return np.stack([source.read_tile(grid[index])[:bands] for index in picks]).astype(np.float32)
+
+
+def save_int8(model, source, path=INT8_MODEL_PATH):
+    """Quantize model on tiles of a reference scene and save it for load_int8"""
+    import torch
+
+    calibration = torch.from_numpy(calibration_tiles(source, bands=model.enc1[0].in_channels))
+    quantized = quantize_int8(model, calibration)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    torch.save({
+        'format': INT8_FORMAT,
+        'engine': QUANTIZED_ENGINE,
+        'weights_sha256': weights_digest(model),
+        'calibration_tiles': len(calibration),
+        'state_dict': quantized.state_dict()
+    }, path)
+    return quantized
+
+
+def load_int8(model, path=INT8_MODEL_PATH):
+    """
+    Rebuild the int8 graph of model and load the qparams saved by save_int8
+
+    Raises:
+        FileNotFoundError: No int8 model at path
+        ValueError: The artifact was made from other weights or another format
+    """
+    import torch
+    from torch.ao.quantization.quantize_fx import convert_fx
+
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No int8 model at {path}: quantize one on a real scene with "
+            f"'python inference_profiles.py SCENE --save-int8' (int8 never calibrates on live input)"
+        )
+    artifact = torch.load(path, map_location='cpu')
+    if artifact.get('format') != INT8_FORMAT:
+        raise ValueError(f"{path} is not an int8 U-Net artifact ({INT8_FORMAT})")
+    if artifact['weights_sha256'] != weights_digest(model):
+        raise ValueError(f"{path} was quantized from different weights; re-run --save-int8")
+
+    # Graph structure only (no calibration pass); the saved state holds the qparams
+    bands = model.enc1[0].in_channels
+    quantized = convert_fx(_prepare_int8(model, torch.zeros(1, bands, 16, 16)))
+    quantized.load_state_dict(artifact['state_dict'])
+    return quantized
+
+
+def get_profile(name):
+    """Create a fresh InferenceProfile by name"""
+    if name not in PROFILE_SPECS:
+        raise ValueError(f"Unknown inference profile '{name}' (choose from {', '.join(PROFILE_SPECS)})")
+    return InferenceProfile(name, **PROFILE_SPECS[name])
+
+
+# ========================================
+# Accuracy vs Latency Report
+# ========================================
+
+def profile_report(model, source, profile_names, tile_size=256, overlap=32, batch_size=8, threshold=0.5):
+    """
+    Run each profile over a reference scene and compare it with fp32
+
+    Each profile gets a warm-up pass before the timed pass; int8 is
+    calibrated on tiles of the reference scene itself.
+
+    Args:
+        model: Eval-mode fp32 UNet (left untouched)
+        source: Tile source for the reference scene
+        profile_names: Profiles to compare; fp32 is always run first as baseline
+
+    Returns:
+        List of per-profile result dictionaries
+    """
+    names = [DEFAULT_PROFILE] + [name for name in profile_names if name != DEFAULT_PROFILE]
+    results = []
+    baseline = None
+
+    calibration = None
+    for name in names:
+        profile = get_profile(name)
+        if profile.quantize and calibration is None:
+            calibration = calibration_tiles(source, bands=model.enc1[0].in_channels)
+        engine = TiledInferenceEngine(
+            TorchBackend(profile.prepare_model(copy.deepcopy(model), calibration if profile.quantize else None),
+                         profile=profile, prepared=True),
+            tile_size=tile_size,
+            overlap=overlap,
+            batch_size=batch_size
+        )
+        engine.predict(source)
+
+        start = time.perf_counter()
+        prob = engine.predict(source)
+        seconds = time.perf_counter() - start
+
+        mask = prob > threshold
+        if baseline is None:
+            baseline = (prob, mask, seconds)
+        base_prob, base_mask, base_seconds = baseline
+
+        union = np.logical_or(mask, base_mask).sum()
+        results.append({
+            'profile': name,
+            'seconds': seconds,
+            'tiles_per_sec': engine.last_stats.tiles_per_sec,
+            'speedup': base_seconds / seconds if seconds > 0 else 0.0,
+            'max_abs_prob_diff': float(np.abs(prob - base_prob).max()),
+            'mask_agreement': float((mask == base_mask).mean()),
+            'mask_iou': float(np.logical_and(mask, base_mask).sum() / union) if union else 1.0,
+            'mining_pixels': int(mask.sum()),
+            'baseline_mining_pixels': int(base_mask.sum())
+        })
+
+    return results
+
+
+def print_report(results):
+    print(f"\n{'Profile':<14}{'Time (s)':>10}{'Tiles/s':>10}{'Speedup':>9}{'Max |Δp|':>10}{'Agree':>9}{'IoU':>8}")
+    print("-" * 70)
+    for r in results:
+        print(
+            f"{r['profile']:<14}{r['seconds']:>10.2f}{r['tiles_per_sec']:>10.1f}{r['speedup']:>8.2f}x"
+            f"{r['max_abs_prob_diff']:>10.4f}{r['mask_agreement']:>9.2%}{r['mask_iou']:>8.3f}"
+        )
+
+
+def main():
+    import torch
+
+    from automated_inference import MODEL_PATH, TILE_SIZE, TILE_OVERLAP, BATCH_SIZE
+    from raster_io import GeoTiffReader
+    from unet import UNet
+
+    parser = argparse.ArgumentParser(description='Compare U-Net CPU inference profiles on a reference scene')
+    parser.add_argument('reference', help='Reference GeoTIFF scene')
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILE_SPECS), choices=list(PROFILE_SPECS))
+    parser.add_argument('--model', default=MODEL_PATH, help='U-Net state dict')
+    parser.add_argument('--threads', type=int, help='Intra-op threads')
+    parser.add_argument('--interop-threads', type=int, help='Inter-op threads')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE)
+    parser.add_argument('--tile-overlap', type=int, default=TILE_OVERLAP)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--output', help='Write the report as JSON to this path')
+    parser.add_argument('--save-int8', nargs='?', const=INT8_MODEL_PATH,
+                        help=f'Quantize the model on the reference scene and save it for the int8 profile '
+                             f'(default: {INT8_MODEL_PATH}), then exit')
+    args = parser.parse_args()
+
+    intra, inter = configure_threads(args.threads, args.interop_threads)
+    print(f"🧵 Threads: {intra} intra-op, {inter} inter-op on {os.cpu_count()} CPUs")
+
+    model = UNet(in_channels=3, out_channels=1)
+    model.load_state_dict(torch.load(args.model, map_location='cpu'))
+    model.eval()
+
+    if args.save_int8:
+        with GeoTiffReader(args.reference) as source:
+            save_int8(model, source, args.save_int8)
+        print(f"📄 int8 model saved to {args.save_int8}")
+        return
+
+    with GeoTiffReader(args.reference) as source:
+        results = profile_report(
+            model, source, args.profiles,
+            tile_size=args.tile_size,
+            overlap=args.tile_overlap,
+            batch_size=args.batch_size
+        )
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'reference': args.reference, 'threads': [intra, inter], 'results': results}, f, indent=2)
+        print(f"\n📄 Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
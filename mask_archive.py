@@ -0,0 +1,217 @@
+"""
+🗄️ Mask Archive
+Append-only, bit-packed, memory-mapped time series of binary masks per AOI,
+with a date index and vectorized history queries
+"""
+
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+ARCHIVE_DIR = "state/archive"
+
+# Rows unpacked per step in history queries
+QUERY_STRIP_ROWS = 512
+
+# Set bits in every byte value, for area series without unpacking
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+class MaskArchive:
+    """
+    Every archived mask of one AOI in a single file
+
+    masks.bin holds fixed-size frames of H x ceil(W / 8) bytes (np.packbits
+    along rows), written in the order they were added; index.json maps each
+    date to its frame and records the grid. A date's mask is therefore one
+    slice of a memmap, and history queries run over the frames in date
+    order, a strip of rows at a time. Re-adding a date overwrites its frame.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.lock = threading.Lock()
+        self.shape = None
+        self.grid = None
+        self.transform = None
+        self.crs = None
+        self.frames = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                index = json.load(f)
+            self.shape = tuple(index['shape'])
+            self.grid = index.get('grid')
+            self.transform = index.get('transform')
+            self.crs = index.get('crs')
+            self.frames = index['frames']
+
+    @property
+    def data_path(self):
+        return self.directory / 'masks.bin'
+
+    @property
+    def index_path(self):
+        return self.directory / 'index.json'
+
+    @property
+    def frame_bytes(self):
+        height, width = self.shape
+        return height * ((width + 7) // 8)
+
+    def dates(self):
+        """Archived dates, oldest first"""
+        return sorted(self.frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, date):
+        return date in self.frames
+
+    def append(self, date, mask, grid=None, transform=None, crs=None):
+        """
+        Archive mask for date ('YYYY-MM-DD')
+
+        Args:
+            transform, crs: Georeferencing of the grid, kept for area queries
+
+        Raises:
+            ValueError: mask shape or grid differs from the archive's
+        """
+        with self.lock:
+            if self.shape is None:
+                self.shape, self.grid = tuple(mask.shape), grid
+            elif tuple(mask.shape) != self.shape or (grid is not None and grid != self.grid):
+                raise ValueError(f"mask {mask.shape} on grid {grid} does not match archive "
+                                 f"{self.shape} on grid {self.grid}")
+
+            frame = self.frames.get(date, len(self.frames))
+            packed = np.packbits(np.asarray(mask) != 0, axis=1)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.data_path, 'r+b' if self.data_path.exists() else 'wb') as f:
+                f.seek(frame * self.frame_bytes)
+                f.write(packed.tobytes())
+
+            # The index is the source of truth: a frame only counts once it is listed
+            self.frames[date] = frame
+            if transform is not None:
+                self.transform, self.crs = list(transform)[:6], str(crs) if crs else None
+            index = {'shape': list(self.shape), 'grid': self.grid, 'transform': self.transform,
+                     'crs': self.crs, 'frames': self.frames}
+            tmp_path = self.index_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+
+    def packed(self):
+        """Read-only [frames, H, ceil(W / 8)] memmap in file order"""
+        height, width = self.shape
+        return np.memmap(self.data_path, dtype=np.uint8, mode='r',
+                         shape=(len(self.frames), height, (width + 7) // 8))
+
+    def _ordered(self, dates=None):
+        dates = self.dates() if dates is None else dates
+        return dates, [self.frames[date] for date in dates]
+
+    def mask(self, date):
+        """Unpacked uint8 [H, W] mask of one date"""
+        return np.unpackbits(self.packed()[self.frames[date]], axis=1, count=self.shape[1])
+
+    def pixel_counts(self):
+        """{date: mining pixel count}, counted on the packed bytes"""
+        packed = self.packed()
+        return {date: int(POPCOUNT[packed[frame]].sum(dtype=np.int64)) for date, frame in zip(*self._ordered())}
+
+    def areas_ha(self, row_areas):
+        """{date: mining hectares}: per-row popcounts dotted with per-row pixel areas"""
+        packed = self.packed()
+        return {
+            date: float(POPCOUNT[packed[frame]].sum(axis=1, dtype=np.int64) @ row_areas)
+            for date, frame in zip(*self._ordered())
+        }
+
+    def first_mining(self):
+        """
+        Index into dates() of the first date each pixel was mining, -1 if never
+
+        Returns:
+            (dates, int16 [H, W] index raster)
+        """
+        dates, frames = self._ordered()
+        packed = self.packed()
+        height, width = self.shape
+        first = np.full(self.shape, -1, dtype=np.int16)
+        for top in range(0, height, QUERY_STRIP_ROWS):
+            rows = slice(top, top + QUERY_STRIP_ROWS)
+            strip = first[rows]
+            for order, frame in enumerate(frames):
+                bits = np.unpackbits(packed[frame, rows], axis=1, count=width).view(bool)
+                strip[bits & (strip < 0)] = order
+        return dates, first
+
+    def mining_counts(self, last=None):
+        """uint16 [H, W] number of the last `last` dates (default all) on which each pixel was mining"""
+        dates, frames = self._ordered()
+        frames = frames[-last:] if last else frames
+        packed = self.packed()
+        height, width = self.shape
+        counts = np.zeros(self.shape, dtype=np.uint16)
+        for top in range(0, height, QUERY_STRIP_ROWS):
+            rows = slice(top, top + QUERY_STRIP_ROWS)
+            bits = np.unpackbits(packed[frames, rows], axis=2, count=width)
+            counts[rows] = bits.sum(axis=0, dtype=np.uint16)
+        return counts
+
+    def persistent(self, n, last):
+        """Boolean [H, W]: pixels mining in at least n of the last `last` dates"""
+        return self.mining_counts(last) >= n
+
+
+def main():
+    from aoi_registry import get_aoi
+    from automated_inference import PIXEL_SIZE_M, STUDY_AREA
+    from incremental import aoi_key
+    from pixel_area import row_areas_ha
+
+    parser = argparse.ArgumentParser(description='Query the archived mask history of an AOI')
+    parser.add_argument('--aoi', help='AOI id from aois.json (default: Chingola)')
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    parser.add_argument('--first-mining', help='Save the first-mining date index raster (.npy) here')
+    parser.add_argument('--persistent', nargs=2, type=int, metavar=('N', 'M'),
+                       help='Report pixels mining in at least N of the last M dates')
+    args = parser.parse_args()
+
+    aoi = get_aoi(args.aoi) if args.aoi else STUDY_AREA
+    archive = MaskArchive(Path(args.archive_dir) / aoi_key(aoi['id']))
+    if not len(archive):
+        print(f"❌ No archived masks for {aoi['id']}")
+        return
+
+    if archive.transform is not None:
+        row_areas = row_areas_ha(archive.transform, archive.shape[0], archive.crs or 'EPSG:4326')
+    else:
+        row_areas = np.full(archive.shape[0], PIXEL_SIZE_M ** 2 / 10000)
+    print(f"🗄️ {aoi['id']}: {len(archive)} masks of {archive.shape[1]}x{archive.shape[0]} px, "
+          f"{archive.data_path.stat().st_size / 1024 ** 2:.1f} MB")
+    for date, area_ha in archive.areas_ha(row_areas).items():
+        print(f"   {date}  {area_ha:10.2f} ha")
+
+    if args.first_mining:
+        dates, first = archive.first_mining()
+        np.save(args.first_mining, first)
+        with open(Path(args.first_mining).with_suffix('.json'), 'w') as f:
+            json.dump({'dates': dates}, f, indent=2)
+        print(f"📄 First-mining index saved to {args.first_mining}")
+
+    if args.persistent:
+        n, last = args.persistent
+        area_ha = np.count_nonzero(archive.persistent(n, last), axis=1) @ row_areas
+        print(f"⛏️  Mining in >= {n} of the last {last} dates: {area_ha:.2f} ha")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+🧮 Multi-Process Inference Pool
+Spreads tile batches over worker processes pinned to disjoint core subsets
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from inference_backends import TorchBackend, OnnxRuntimeBackend
+from inference_profiles import get_profile
+from tiled_inference import TiledInferenceEngine
+
+# Set in each worker by _init_worker
+_worker_backend = None
+
+
+# ========================================
+# Core Assignment
+# ========================================
+
+def available_cores():
+    """CPU ids this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(workers, cores=None):
+    """
+    Split cores into one contiguous subset per worker
+
+    Returns:
+        List of core-id lists; extra cores go to the first workers
+    """
+    cores = list(cores if cores is not None else available_cores())
+    workers = max(1, min(workers, len(cores)))
+    size, extra = divmod(len(cores), workers)
+
+    core_sets, start = [], 0
+    for index in range(workers):
+        stop = start + size + (1 if index < extra else 0)
+        core_sets.append(cores[start:stop])
+        start = stop
+    return core_sets
+
+
+# ========================================
+# Worker Process
+# ========================================
+
+def _init_worker(spec, core_sets, counter):
+    """Pin this worker to its core subset, size torch threads to it and build its backend"""
+    global _worker_backend
+
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+
+    cores = core_sets[index % len(core_sets)]
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+
+    kind = spec[0]
+    if kind == 'onnx':
+        _worker_backend = OnnxRuntimeBackend(spec[1], num_threads=len(cores), num_interop_threads=1)
+    else:
+        import torch
+
+        torch.set_num_threads(len(cores))
+        model, profile = spec[1], spec[2]
+        _worker_backend = TorchBackend(model, profile=profile, prepared=True)
+
+
+def _predict_chunk(chunk):
+    return _worker_backend.predict_batch(chunk)
+
+
+# ========================================
+# Pool Backend
+# ========================================
+
+class ProcessPoolBackend:
+    """
+    Inference backend that splits each batch across worker processes
+
+    Workers are forked after the model is loaded, so they share its
+    weights copy-on-write; on platforms without fork the weights are moved
+    to shared memory before being handed to the spawned workers. The
+    profile conversion (int8 calibration included) runs once, here, so
+    every worker runs the identical model.
+    """
+
+    name = 'pool'
+
+    def __init__(self, workers, model=None, profile='fp32', onnx_path=None):
+        if model is None and onnx_path is None:
+            raise ValueError("ProcessPoolBackend needs a model or an ONNX path")
+
+        self.core_sets = split_cores(workers)
+        self.workers = len(self.core_sets)
+
+        method = 'fork' if 'fork' in mp.get_all_start_methods() else 'spawn'
+        if onnx_path:
+            spec = ('onnx', str(onnx_path))
+        else:
+            # Registers torch's shared-memory pickling of tensors for the pool
+            import torch.multiprocessing
+
+            profile = get_profile(profile)
+            model = profile.prepare_model(model)
+            if method == 'spawn':
+                model.share_memory()
+            spec = ('torch', model, profile)
+
+        context = mp.get_context(method)
+        counter = context.Value('i', 0)
+        self.pool = context.Pool(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(spec, self.core_sets, counter)
+        )
+
+    def predict_batch(self, batch):
+        """Split a [N, C, T, T] batch across workers and reassemble [N, T, T] probabilities"""
+        chunks = [chunk for chunk in np.array_split(batch, min(self.workers, len(batch))) if len(chunk)]
+        return np.concatenate(self.pool.map(_predict_chunk, chunks))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+# ========================================
+# Speedup Report
+# ========================================
+
+def pool_speedup(model, source, workers, tile_size=256, overlap=32, batch_size=8, profile='fp32'):
+    """
+    Time the same scene single-process and through the pool
+
+    The pool run uses batch_size tiles per worker so every worker gets a
+    full batch per step.
+
+    Returns:
+        Dictionary with timings, tiles/sec, speedup and parallel efficiency
+    """
+    single = TiledInferenceEngine(
+        TorchBackend(model, profile=get_profile(profile)),
+        tile_size=tile_size, overlap=overlap, batch_size=batch_size
+    )
+    single.predict(source)  # Warm-up, matching the pool run
+    start = time.perf_counter()
+    single.predict(source)
+    single_seconds = time.perf_counter() - start
+
+    backend = ProcessPoolBackend(workers, model=model, profile=profile)
+    try:
+        pooled = TiledInferenceEngine(
+            backend, tile_size=tile_size, overlap=overlap, batch_size=batch_size * backend.workers
+        )
+        pooled.predict(source)  # Warm-up so worker start-up is not counted
+        start = time.perf_counter()
+        pooled.predict(source)
+        pool_seconds = time.perf_counter() - start
+    finally:
+        backend.close()
+
+    speedup = single_seconds / pool_seconds if pool_seconds > 0 else 0.0
+    return {
+        'workers': backend.workers,
+        'cores_per_worker': [len(cores) for cores in backend.core_sets],
+        'single_seconds': single_seconds,
+        'pool_seconds': pool_seconds,
+        'single_tiles_per_sec': single.last_stats.tiles_per_sec,
+        'pool_tiles_per_sec': pooled.last_stats.tiles_per_sec,
+        'speedup': speedup,
+        'efficiency': speedup / backend.workers
+    }
+
+
+def main():
+    import torch
+
+    from automated_inference import MODEL_PATH, TILE_SIZE, TILE_OVERLAP, BATCH_SIZE
+    from raster_io import GeoTiffReader
+    from unet import UNet
+
+    parser = argparse.ArgumentParser(description='Measure multi-process inference speedup on a scene')
+    parser.add_argument('scene', help='Reference GeoTIFF scene')
+    parser.add_argument('--workers', type=int, nargs='+', default=[len(available_cores())],
+                       help='Worker counts to try')
+    parser.add_argument('--model', default=MODEL_PATH, help='U-Net state dict')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE)
+    parser.add_argument('--tile-overlap', type=int, default=TILE_OVERLAP)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Tiles per worker per step')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    model = UNet(in_channels=3, out_channels=1)
+    model.load_state_dict(torch.load(args.model, map_location='cpu'))
+    model.eval()
+
+    results = []
+    with GeoTiffReader(args.scene) as source:
+        for workers in args.workers:
+            result = pool_speedup(
+                model, source, workers,
+                tile_size=args.tile_size, overlap=args.tile_overlap, batch_size=args.batch_size
+            )
+            results.append(result)
+            print(f"👷 {result['workers']} workers: {result['pool_seconds']:.2f}s vs {result['single_seconds']:.2f}s "
+                  f"single-process -> {result['speedup']:.2f}x ({result['efficiency']:.0%} efficiency)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
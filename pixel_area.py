@@ -0,0 +1,76 @@
+"""
+📐 Geodesic Pixel Areas
+Per-row ground area of a raster grid, computed once from its geotransform on
+the WGS84 ellipsoid and cached, so a mask's area is one dot product
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+from affine import Affine
+from rasterio.crs import CRS
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+WGS84_E = math.sqrt(WGS84_F * (2 - WGS84_F))
+
+SQUARE_METERS_PER_HECTARE = 10000.0
+
+
+def as_affine(transform):
+    """Affine from an Affine or its first six coefficients [dx, rx, x0, ry, dy, y0] (EE crs_transform order)"""
+    if isinstance(transform, Affine):
+        return transform
+    values = [float(value) for value in transform]
+    if len(values) != 6:
+        raise ValueError(f"expected 6 transform coefficients, got {len(values)}")
+    return Affine(*values)
+
+
+def _zone_area(lat_rad):
+    """Ellipsoid area between the equator and lat per radian of longitude (m^2)"""
+    sin_lat = np.sin(lat_rad)
+    e_sin = WGS84_E * sin_lat
+    q = sin_lat / (1 - e_sin ** 2) + np.log((1 + e_sin) / (1 - e_sin)) / (2 * WGS84_E)
+    return WGS84_B ** 2 * q / 2
+
+
+@lru_cache(maxsize=256)
+def _row_areas(coefficients, height, geographic):
+    transform = Affine(*coefficients)
+    if not geographic:
+        # Projected CRS: every pixel has the same planar area
+        return np.full(height, abs(transform.determinant) / SQUARE_METERS_PER_HECTARE)
+
+    if transform.b != 0 or transform.d != 0:
+        raise ValueError("geodesic row areas need a north-up geographic grid")
+    edges = transform.f + transform.e * np.arange(height + 1, dtype=np.float64)
+    zones = _zone_area(np.radians(np.clip(edges, -90.0, 90.0)))
+    areas = np.abs(np.diff(zones)) * math.radians(abs(transform.a)) / SQUARE_METERS_PER_HECTARE
+    areas.flags.writeable = False
+    return areas
+
+
+def row_areas_ha(transform, height, crs='EPSG:4326'):
+    """
+    Ground area in hectares of one pixel in each row of a grid
+
+    Args:
+        transform: Pixel-to-CRS transform (see as_affine)
+        height: Rows in the grid
+        crs: Grid CRS; geographic grids get exact ellipsoidal areas per
+             row (constant along a row), projected grids a constant area
+
+    Returns:
+        Read-only float64 [height] array, cached per (transform, height, CRS kind)
+    """
+    geographic = CRS.from_user_input(crs).is_geographic if crs is not None else True
+    return _row_areas(tuple(as_affine(transform)[:6]), int(height), geographic)
+
+
+def mask_area_ha(mask, row_areas):
+    """Area of the non-zero pixels of an [H, W] mask: per-row counts dotted with per-row areas"""
+    return float(np.count_nonzero(mask, axis=1) @ np.broadcast_to(row_areas, (mask.shape[0],)))
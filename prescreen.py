@@ -0,0 +1,125 @@
+"""
+🌿 Spectral Tile Pre-Screen
+Skips the U-Net on tiles that are clearly vegetation or water (NDVI / brightness statistics)
+"""
+
+import numpy as np
+
+# Band order of the downloaded scene: B4 (red), B3 (green), B2 (blue), B8 (NIR, optional)
+RED, GREEN, BLUE, NIR = 0, 1, 2, 3
+
+# Pixels greener than this cannot be open-pit ground.
+# Conservative next to the -0.2 NDVI-loss threshold in gee_automation's change detection.
+NDVI_VEGETATION_MIN = 0.35
+
+# Visible-band fallback when no NIR band is present: green-red index (G - R) / (G + R)
+GRVI_VEGETATION_MIN = 0.05
+
+# Normalized mean RGB reflectance below this is water or deep shadow
+DARK_MAX = 0.04
+
+# A tile with fewer candidate (bare, non-dark) pixels than this fraction is skipped
+MIN_CANDIDATE_FRACTION = 0.005
+
+
+class SpectralPrescreen:
+    """
+    Tile filter marking tiles as "certainly not mining"
+
+    A pixel is a mining candidate when it is neither vegetated (NDVI, or
+    the visible green-red index without NIR) nor dark (water/shadow).
+    Tiles with almost no candidates get an all-zero mask and skip the
+    network.
+
+    In audit mode nothing is skipped: tiles are only flagged, and
+    audit_recall() checks the full prediction for mining pixels inside
+    them.
+    """
+
+    name = 'prescreen'
+
+    def __init__(self, ndvi_min=NDVI_VEGETATION_MIN, grvi_min=GRVI_VEGETATION_MIN, dark_max=DARK_MAX,
+                 min_candidate_fraction=MIN_CANDIDATE_FRACTION, audit=False, threshold=0.5):
+        self.ndvi_min = ndvi_min
+        self.grvi_min = grvi_min
+        self.dark_max = dark_max
+        self.min_candidate_fraction = min_candidate_fraction
+        self.audit = audit
+        self.threshold = threshold
+        self.begin(None)
+
+    def begin(self, grid):
+        self.tiles_seen = 0
+        self.tiles_skippable = 0
+        self.flagged = []
+        self.mining_pixels = None
+        self.missed_pixels = None
+
+    def candidate_fraction(self, data):
+        """Fraction of pixels that are neither vegetation nor dark"""
+        red, green, blue = data[RED], data[GREEN], data[BLUE]
+
+        if data.shape[0] > NIR:
+            nir = data[NIR]
+            vegetated = (nir - red) > self.ndvi_min * (nir + red)
+        else:
+            vegetated = (green - red) > self.grvi_min * (green + red)
+
+        dark = (red + green + blue) < 3 * self.dark_max
+        return float(np.count_nonzero(~(vegetated | dark))) / red.size
+
+    def lookup(self, tile, data):
+        self.tiles_seen += 1
+        if self.candidate_fraction(data) >= self.min_candidate_fraction:
+            return None
+
+        self.tiles_skippable += 1
+        if self.audit:
+            self.flagged.append(tile)
+            return None
+        return 0.0
+
+    def audit_recall(self, probability):
+        """
+        Count mining pixels of a full (unskipped) prediction that fall inside flagged tiles
+
+        This is an upper bound on what skipping would lose, since pixels in
+        tile overlaps would still get the neighbouring tile's prediction.
+        """
+        mask = probability > self.threshold
+        covered = np.zeros(mask.shape, dtype=bool)
+        for tile in self.flagged:
+            covered[tile.y:tile.y + tile.height, tile.x:tile.x + tile.width] = True
+
+        self.mining_pixels = int(np.count_nonzero(mask))
+        self.missed_pixels = int(np.count_nonzero(mask & covered))
+
+    def report(self):
+        """
+        Skip ratio and (after audit_recall) recall impact of the last predict() call
+
+        recall_retained is the share of predicted mining pixels lying
+        outside skippable tiles.
+        """
+        report = {
+            'tiles': self.tiles_seen,
+            'skippable_tiles': self.tiles_skippable,
+            'skip_ratio': self.tiles_skippable / self.tiles_seen if self.tiles_seen else 0.0,
+            'audit': self.audit
+        }
+        if self.mining_pixels is not None:
+            report['mining_pixels'] = self.mining_pixels
+            report['missed_mining_pixels'] = self.missed_pixels
+            report['recall_retained'] = (
+                1.0 - self.missed_pixels / self.mining_pixels if self.mining_pixels else 1.0
+            )
+        return report
+
+    def summary(self):
+        report = self.report()
+        text = (f"Pre-screen: {report['skippable_tiles']}/{report['tiles']} tiles "
+                f"certainly not mining ({report['skip_ratio']:.0%})")
+        if self.mining_pixels is not None:
+            text += (f", audit: {report['missed_mining_pixels']} of {report['mining_pixels']} "
+                     f"mining pixels inside them (recall retained {report['recall_retained']:.2%})")
+        return text
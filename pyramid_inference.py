@@ -0,0 +1,221 @@
+"""
+🔺 Coarse-to-Fine Pyramid Inference
+Screens the whole AOI at 30m, then fetches and segments only candidate regions at 10m
+"""
+
+import copy
+from pathlib import Path
+
+import cv2
+import numpy as np
+from affine import Affine
+
+COARSE_SCALE_M = 30
+FINE_SCALE_M = 10
+
+# Coarse probability above which a pixel is a candidate (below 0.5 to favour recall)
+CANDIDATE_THRESHOLD = 0.3
+
+# Candidates are grown by this many coarse pixels so boxes include context
+CANDIDATE_MARGIN_PX = 4
+
+# Longest fine-box side in pixels (4 bands x 2048^2 x uint16 stays well under the 50MB GEE limit)
+MAX_FINE_BOX_PX = 2048
+
+
+def candidate_boxes(probability, threshold=CANDIDATE_THRESHOLD, margin=CANDIDATE_MARGIN_PX):
+    """
+    Bounding boxes of candidate regions in a coarse probability map
+
+    Candidates are dilated by margin pixels, so nearby blobs share a box;
+    boxes that still overlap are merged.
+
+    Returns:
+        List of (y0, x0, y1, x1) boxes in coarse pixels, end-exclusive
+    """
+    candidates = (probability > threshold).astype(np.uint8)
+    if margin > 0:
+        kernel = np.ones((2 * margin + 1, 2 * margin + 1), dtype=np.uint8)
+        candidates = cv2.dilate(candidates, kernel)
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(candidates, connectivity=8)
+    boxes = [
+        (y, x, y + h, x + w)
+        for x, y, w, h in stats[1:count, :4].tolist()
+    ]
+    return merge_boxes(boxes)
+
+
+def merge_boxes(boxes):
+    """Merge overlapping boxes until none overlap"""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for index, other in enumerate(result):
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    result[index] = (min(box[0], other[0]), min(box[1], other[1]),
+                                     max(box[2], other[2]), max(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
+
+
+def split_box(box, max_size):
+    """Split a (y0, x0, y1, x1) box into pieces no longer than max_size per side"""
+    y0, x0, y1, x1 = box
+    return [
+        (y, x, min(y + max_size, y1), min(x + max_size, x1))
+        for y in range(y0, y1, max_size)
+        for x in range(x0, x1, max_size)
+    ]
+
+
+def box_bounds(transform, box):
+    """[min_lon, min_lat, max_lon, max_lat] of a pixel box under a north-up transform"""
+    y0, x0, y1, x1 = box
+    left, top = transform * (x0, y0)
+    right, bottom = transform * (x1, y1)
+    return [min(left, right), min(top, bottom), max(left, right), max(top, bottom)]
+
+
+class PyramidInference:
+    """
+    Two-level detection for one scene
+
+    The coarse pass runs the detector's engine over the whole AOI at
+    COARSE_SCALE_M. Candidate boxes are then downloaded on a fine grid that
+    subdivides the coarse pixels exactly (pixel-aligned via crs_transform)
+    and segmented at FINE_SCALE_M. The merged mask covers the whole AOI at
+    fine resolution, so calculate_area() sees 10m pixels; pixels outside
+    every box are below the candidate threshold and stay zero.
+
+    Both passes run without the incremental state and the tile cache:
+    coarse and fine boxes each have their own grid, which would reset the
+    scene's incremental state and fill the cache with pyramid tiles.
+    """
+
+    def __init__(self, detector, coarse_scale=COARSE_SCALE_M, fine_scale=FINE_SCALE_M,
+                 threshold=CANDIDATE_THRESHOLD, margin=CANDIDATE_MARGIN_PX, max_box=MAX_FINE_BOX_PX):
+        if coarse_scale % fine_scale:
+            raise ValueError("coarse_scale must be a multiple of fine_scale")
+        self.detector = detector
+        self.coarse_scale = coarse_scale
+        self.fine_scale = fine_scale
+        self.factor = coarse_scale // fine_scale
+        self.threshold = threshold
+        self.margin = margin
+        self.max_box = max_box
+        self.last_report = None
+        self.last_transform = None
+
+    def _predict_file(self, path):
+        """Probability map and transform of a downloaded GeoTIFF"""
+        source, _ = self.detector.preprocess_image(path)
+        if source is None:
+            raise RuntimeError(f"Could not open {path}")
+        # Same backend, stateless filters only (the pre-screen looks at one tile at a time)
+        engine = copy.copy(self.detector.engine)
+        engine.tile_filters = [f for f in engine.tile_filters if f is self.detector.prescreen]
+        try:
+            with self.detector.inference_lock:
+                probability = engine.predict(source)
+            self.detector.engine.last_stats = engine.last_stats
+            return probability, source.transform
+        finally:
+            source.close()
+
+    def _download(self, url, path):
+        if not self.detector.download_image(url, path):
+            raise RuntimeError(f"Download failed for {path.name}")
+        return path
+
+    def run(self, imagery, work_dir):
+        """
+        Detect mining in one scene
+
+        Args:
+            imagery: Result of MiningDetector.find_latest_image()
+            work_dir: Directory for temporary downloads
+
+        Returns:
+            uint8 mask at fine resolution over the whole AOI
+        """
+        work_dir = Path(work_dir)
+        stamp = f"{self.detector.aoi['id']}_{imagery['date'].strftime('%Y%m%d')}"
+        image = imagery['image']
+
+        # Level 1: whole AOI at coarse resolution
+        coarse_path = work_dir / f"coarse_{stamp}.tif"
+        self._download(self.detector.download_url(image, scale=self.coarse_scale), coarse_path)
+        try:
+            coarse_prob, coarse_transform = self._predict_file(coarse_path)
+        finally:
+            coarse_path.unlink(missing_ok=True)
+
+        boxes = [
+            piece
+            for box in candidate_boxes(coarse_prob, self.threshold, self.margin)
+            for piece in split_box(box, max(1, self.max_box // self.factor))
+        ]
+        print(f"   Coarse pass: {coarse_prob.shape[1]}x{coarse_prob.shape[0]} px at {self.coarse_scale}m, "
+              f"{len(boxes)} candidate boxes")
+
+        # Level 2: candidate boxes on a fine grid nested in the coarse one
+        fine_transform = coarse_transform * Affine.scale(1 / self.factor)
+        fine_shape = (coarse_prob.shape[0] * self.factor, coarse_prob.shape[1] * self.factor)
+        mask = np.zeros(fine_shape, dtype=np.uint8)
+        fine_pixels = 0
+
+        for index, box in enumerate(boxes):
+            fine_box = tuple(value * self.factor for value in box)
+            url = self.detector.download_url(
+                image, bounds=box_bounds(fine_transform, fine_box), crs_transform=fine_transform[:6]
+            )
+            fine_path = work_dir / f"fine_{stamp}_{index}.tif"
+            try:
+                self._download(url, fine_path)
+                fine_prob, transform = self._predict_file(fine_path)
+            except Exception as e:
+                # Fall back to the coarse answer for this box
+                print(f"⚠️  Fine pass failed for box {index} ({e}), using the coarse prediction")
+                y0, x0, y1, x1 = box
+                coarse_mask = (coarse_prob[y0:y1, x0:x1] > 0.5).astype(np.uint8)
+                mask[fine_box[0]:fine_box[2], fine_box[1]:fine_box[3]] = np.kron(
+                    coarse_mask, np.ones((self.factor, self.factor), dtype=np.uint8)
+                )
+                continue
+            finally:
+                fine_path.unlink(missing_ok=True)
+
+            self._place(mask, fine_prob > 0.5, ~fine_transform * (transform.c, transform.f))
+            fine_pixels += fine_prob.size
+
+        self.last_transform = fine_transform
+        total = fine_shape[0] * fine_shape[1]
+        self.last_report = {
+            'coarse_shape': list(coarse_prob.shape),
+            'fine_shape': list(fine_shape),
+            'boxes': len(boxes),
+            'fine_pixels': fine_pixels,
+            'fine_fraction': fine_pixels / total if total else 0.0
+        }
+        print(f"   Fine pass: {len(boxes)} boxes at {self.fine_scale}m, "
+              f"{self.last_report['fine_fraction']:.1%} of the AOI fetched at full resolution")
+        return mask
+
+    @staticmethod
+    def _place(mask, piece, origin):
+        """OR a piece into the mask at a (col, row) origin, clipping to the mask"""
+        x, y = (int(round(value)) for value in origin)
+        top, left = max(y, 0), max(x, 0)
+        bottom = min(y + piece.shape[0], mask.shape[0])
+        right = min(x + piece.shape[1], mask.shape[1])
+        if bottom <= top or right <= left:
+            return
+        mask[top:bottom, left:right] |= piece[top - y:bottom - y, left - x:right - x]
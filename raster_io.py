@@ -0,0 +1,81 @@
+"""
+🗺️ Windowed Raster Reader
+Reads GeoTIFF tiles window-by-window, keeping native reflectance and georeferencing
+"""
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+# Sentinel-2 SR reflectance value mapped to 1.0 (same 0-3000 range as the RGB visualization)
+REFLECTANCE_MAX = 3000.0
+
+# Value mapped to 1.0 for each native dtype when no explicit scale is given
+DTYPE_SCALES = {
+    'uint8': 255.0,
+    'uint16': REFLECTANCE_MAX,
+    'int16': REFLECTANCE_MAX
+}
+
+
+class GeoTiffReader:
+    """
+    Tile source backed by a GeoTIFF on disk
+
+    Only the window under each tile is read (through GDAL's block cache),
+    so the full image is never decoded or converted to float32 at once.
+    """
+
+    def __init__(self, path, bands=(1, 2, 3), scale=None):
+        """
+        Args:
+            path: GeoTIFF path
+            bands: 1-based band indexes fed to the model, in order
+            scale: Native value mapped to 1.0 (defaults by dtype)
+        """
+        self.path = str(path)
+        self.dataset = rasterio.open(self.path)
+        self.band_indexes = list(bands)
+        self.bands = len(self.band_indexes)
+        self.height = self.dataset.height
+        self.width = self.dataset.width
+        self.dtype = np.dtype(self.dataset.dtypes[self.band_indexes[0] - 1])
+        self.scale = float(scale) if scale else DTYPE_SCALES.get(self.dtype.name, 1.0)
+
+    @property
+    def shape(self):
+        return self.height, self.width
+
+    @property
+    def transform(self):
+        """Affine pixel-to-CRS transform"""
+        return self.dataset.transform
+
+    @property
+    def geotransform(self):
+        """GDAL-style (x0, dx, rx, y0, ry, dy) geotransform"""
+        return self.dataset.transform.to_gdal()
+
+    @property
+    def crs(self):
+        return self.dataset.crs
+
+    def read_window(self, y, x, height, width):
+        """Read a [C, h, w] window in the file's native dtype"""
+        return self.dataset.read(self.band_indexes, window=Window(x, y, width, height))
+
+    def read_tile(self, tile):
+        """Read one tile as normalized float32 [C, h, w]"""
+        raw = self.read_window(tile.y, tile.x, tile.height, tile.width)
+        block = raw.astype(np.float32)
+        block *= 1.0 / self.scale
+        return np.clip(block, 0.0, 1.0, out=block)
+
+    def close(self):
+        self.dataset.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
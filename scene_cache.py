@@ -0,0 +1,305 @@
+"""
+💽 Scene Cache
+Persistent local cache of downloaded scenes with resumable, size-checked downloads
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import rasterio
+
+from http_transport import default_transport
+from tile_cache import evict_lru
+
+try:
+    import fcntl
+except ImportError:  # Windows: producers of one key are serialized within the process only
+    fcntl = None
+
+SCENE_CACHE_DIR = "cache/scenes"
+SCENE_CACHE_MAX_BYTES = 20 * 1024 ** 3
+
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+DOWNLOAD_TIMEOUT_SECONDS = 300
+
+# Partial downloads untouched for this long are abandoned and evicted
+STALE_PARTIAL_SECONDS = 24 * 3600
+
+
+def scene_key(image_id, bands, scale, bounds, **extra):
+    """sha256 of what determines a scene's pixels: image, bands, scale and region"""
+    fields = {'image': image_id, 'bands': list(bands), 'scale': scale, 'bounds': [float(b) for b in bounds]}
+    fields.update(extra)
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_geotiff(path):
+    """Raise if path is not a readable raster (catches truncated or error-page downloads)"""
+    with rasterio.open(path) as dataset:
+        dataset.read(1, window=((dataset.height - 1, dataset.height), (0, dataset.width)))
+
+
+def content_range_total(response):
+    """Total size from a Content-Range header ('bytes 0-99/1234' or 'bytes */1234'), or None"""
+    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
+def download_resumable(url, path, session=None, chunk_bytes=DOWNLOAD_CHUNK_BYTES):
+    """
+    Stream url to path, resuming a partial download with an HTTP Range request
+
+    Bytes go to <path>.part, next to a <path>.part.json sidecar recording
+    the URL, ETag and total size of the response they came from. A part
+    file is only resumed for the same URL (and with If-Range on its ETag,
+    so a changed resource comes back whole); otherwise, or when the 206
+    does not continue at the part's size of the same total, the download
+    starts over. A 416 counts as complete only if the part has the
+    recorded total size. The part file is renamed to path once the
+    received size matches the announced length.
+
+    Retries are the shared transport's; a transfer broken mid-stream
+    raises and resumes from the part file on the next call.
+
+    Returns:
+        Number of bytes in the finished file
+    """
+    path = Path(path)
+    part_path = path.with_name(path.name + '.part')
+    state_path = path.with_name(path.name + '.part.json')
+    session = session or default_transport()
+
+    state = None
+    if part_path.exists():
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = None
+        if state is None or state.get('url') != url:
+            _discard_part(part_path, state_path)
+            state = None
+
+    offset = part_path.stat().st_size if state is not None else 0
+    headers = {}
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+        if state.get('etag'):
+            headers['If-Range'] = state['etag']
+
+    with session.get(url, stream=True, headers=headers, timeout=DOWNLOAD_TIMEOUT_SECONDS) as response:
+        if response.status_code == 416:
+            recorded = state.get('total') if state is not None else None
+            if offset and offset == recorded and content_range_total(response) in (None, recorded):
+                # Nothing left to send: the part file is already complete
+                os.replace(part_path, path)
+                state_path.unlink(missing_ok=True)
+                return offset
+            restart = True
+        else:
+            response.raise_for_status()
+            restart = False
+
+        resumed = response.status_code == 206
+        if resumed:
+            first = response.headers.get('Content-Range', '').partition(' ')[2].partition('-')[0]
+            total = content_range_total(response)
+            recorded = state.get('total') if state is not None else None
+            # Not the continuation of our part file: start over
+            restart = first != str(offset) or (recorded is not None and total != recorded)
+        elif not restart:
+            length = response.headers.get('Content-Length')
+            total = int(length) if length is not None else None
+            with open(state_path, 'w') as f:
+                json.dump({'url': url, 'etag': response.headers.get('ETag'), 'total': total}, f)
+
+        if not restart:
+            with open(part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_bytes):
+                    f.write(chunk)
+
+    if restart:
+        _discard_part(part_path, state_path)
+        if not offset:
+            raise IOError(f"unexpected HTTP {response.status_code} to a download from the start")
+        return download_resumable(url, path, session, chunk_bytes)
+
+    size = part_path.stat().st_size
+    if total is not None and size != total:
+        raise IOError(f"received {size} of {total} bytes")
+    os.replace(part_path, path)
+    state_path.unlink(missing_ok=True)
+    return size
+
+
+def _discard_part(part_path, state_path):
+    part_path.unlink(missing_ok=True)
+    state_path.unlink(missing_ok=True)
+
+
+class SceneCache:
+    """
+    Directory of downloaded scenes keyed by scene_key()
+
+    Each entry is <key>.tif plus a <key>.json sidecar recording its size
+    and sha256. A hit is checked against the sidecar size; the checksum is
+    only recomputed with verify=True, since hashing a multi-GB scene on
+    every hit would cost more than the download it saves. A hit bumps the entry's mtime for LRU eviction. Producers of
+    one key hold a per-key lock (a file lock, so across processes too): the
+    first writes the scene, the others then find it in the cache.
+    """
+
+    def __init__(self, cache_dir=SCENE_CACHE_DIR, max_bytes=SCENE_CACHE_MAX_BYTES, verify=False, session=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.session = session or default_transport()
+        self.hits = 0
+        self.misses = 0
+        self.key_locks = {}
+        self.key_locks_lock = threading.Lock()
+
+    def path(self, key):
+        return self.cache_dir / f'{key}.tif'
+
+    def _meta_path(self, key):
+        return self.cache_dir / f'{key}.json'
+
+    def get(self, key):
+        """Cached scene path, or None if missing or failing its integrity check"""
+        path, meta_path = self.path(key), self._meta_path(key)
+        if not path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if path.stat().st_size != meta['size'] or (self.verify and file_sha256(path) != meta['sha256']):
+                raise IOError("size or checksum mismatch")
+            os.utime(path)
+        except Exception as e:
+            print(f"⚠️  Dropping corrupt cached scene {path.name}: {e}")
+            self._remove(path)
+            return None
+        return path
+
+    def _lock(self, key):
+        """Context manager holding the producer lock of key"""
+        with self.key_locks_lock:
+            lock = self.key_locks.setdefault(key, threading.Lock())
+        return _KeyLock(lock, self.cache_dir / '.locks' / f'{key}.lock')
+
+    def fetch(self, key, url, **info):
+        """Cached scene for key, downloading url (resumably) on a miss"""
+        return self.produce(key, lambda path: download_resumable(url, path, session=self.session), **info)
+
+    def produce(self, key, create, **info):
+        """
+        Cached scene for key, calling create(path) to write it on a miss
+
+        Args:
+            create: Callable writing the scene to the given temporary path
+            info: Extra fields stored in the sidecar (e.g. image id, bands)
+        """
+        path = self.get(key)
+        if path is None:
+            with self._lock(key):
+                # Another producer may have finished it while we waited
+                path = self.get(key)
+                if path is None:
+                    self.misses += 1
+                    path = self._produce(key, create, info)
+                    self.evict(keep=path)
+                    return path
+        self.hits += 1
+        print(f"💽 Scene cache hit: {path.name}")
+        return path
+
+    def _produce(self, key, create, info):
+        # Stable temporary name (safe under the key lock) so an interrupted download resumes on the next run
+        tmp_path = self.cache_dir / f'{key}.incoming'
+        create(tmp_path)
+        try:
+            check_geotiff(tmp_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        meta = dict(info, size=tmp_path.stat().st_size, sha256=file_sha256(tmp_path), created=time.time())
+        meta_tmp = self._meta_path(key).with_suffix('.json.tmp')
+        with open(meta_tmp, 'w') as f:
+            json.dump(meta, f, indent=2, default=str)
+        path = self.path(key)
+        os.replace(tmp_path, path)
+        os.replace(meta_tmp, self._meta_path(key))
+        return path
+
+    def evict(self, keep=None):
+        """
+        Drop least recently used scenes beyond max_bytes
+
+        Partial downloads (.incoming/.part) count towards the cap. Stale ones
+        (untouched for STALE_PARTIAL_SECONDS) are deleted; fresh ones may
+        still be written by a producer and, like keep (the scene just
+        added), are never evicted.
+        """
+        partials = (*self.cache_dir.glob('*.incoming'), *self.cache_dir.glob('*.part'))
+        stale_before = time.time() - STALE_PARTIAL_SECONDS
+        for path in partials:
+            try:
+                if path.stat().st_mtime < stale_before:
+                    path.unlink(missing_ok=True)
+                    path.with_name(path.name + '.json').unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+
+        def protected(path):
+            return path == keep or path.suffix in ('.incoming', '.part')
+        return evict_lru(self.cache_dir, ('*.tif', '*.incoming', '*.part'), self.max_bytes,
+                         remove=self._remove, keep=protected)
+
+    def _remove(self, path):
+        path.unlink(missing_ok=True)
+        path.with_suffix('.json').unlink(missing_ok=True)
+
+    def summary(self):
+        return f"Scene cache: {self.hits} hits, {self.misses} misses"
+
+
+class _KeyLock:
+    """A thread lock plus, where available, an exclusive flock on a lock file"""
+
+    def __init__(self, lock, path):
+        self.lock = lock
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.lock.acquire()
+        if fcntl is not None:
+            try:
+                self.path.parent.mkdir(exist_ok=True)
+                self.file = open(self.path, 'w')
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+            except Exception:
+                self.__exit__()
+                raise
+        return self
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.lock.release()
@@ -0,0 +1,218 @@
+"""
+⛏️ Mining Site Extraction
+Labels connected mining regions strip by strip (merging components across
+strip seams), with per-site area, centroid, bounding box, growth since the
+previous run and simplified polygons
+"""
+
+import json
+
+import cv2
+import numpy as np
+
+from change_detection import GAINED, PERSISTENT
+
+# Rows labelled per step; components crossing a seam are merged afterwards
+SITE_STRIP_ROWS = 1024
+
+# Components smaller than this are speckle, not sites
+MIN_SITE_PIXELS = 4
+
+# Douglas-Peucker tolerance for site outlines, in pixels
+SIMPLIFY_TOLERANCE_PX = 1.0
+
+
+def _find(parent, label):
+    root = label
+    while parent[root] != root:
+        root = parent[root]
+    while parent[label] != root:
+        parent[label], label = root, parent[label]
+    return root
+
+
+def seam_pairs(above, below):
+    """Unique (label above, label below) pairs of 8-connected foreground pixels across a seam"""
+    width = above.shape[0]
+    pairs = []
+    for shift in (-1, 0, 1):
+        a = above[max(shift, 0):width + min(shift, 0)]
+        b = below[max(-shift, 0):width - max(shift, 0)]
+        touching = (a > 0) & (b > 0)
+        pairs.append(np.stack([a[touching], b[touching]], axis=1))
+    pairs = np.concatenate(pairs)
+    return np.unique(pairs, axis=0) if len(pairs) else pairs
+
+
+class SiteExtractor:
+    """
+    Connected-component labelling of a binary mask in row strips
+
+    Each strip is labelled with cv2.connectedComponentsWithStats (8-connected)
+    and its components get global ids; labels touching across a strip seam
+    are merged with union-find. Per-component sums (pixels, area, centroid
+    moments, bounding box, gained/persistent pixels) are gathered during the
+    single labelling pass and folded onto the merged sites, so only the
+    optional polygon pass reads the label raster again.
+    """
+
+    def __init__(self, strip_rows=SITE_STRIP_ROWS, min_pixels=MIN_SITE_PIXELS,
+                 tolerance_px=SIMPLIFY_TOLERANCE_PX):
+        self.strip_rows = strip_rows
+        self.min_pixels = min_pixels
+        self.tolerance_px = tolerance_px
+
+    def extract(self, mask, pixel_area_ha, transform=None, change=None, polygons=True, labels=None):
+        """
+        Extract mining sites from a mask
+
+        Args:
+            mask: [H, W] binary mask (array or np.memmap)
+            pixel_area_ha: Hectares per pixel, scalar or per-row array of length H
+            transform: Affine pixel-to-lon/lat transform (pixel coordinates when None)
+            change: Optional change raster from change_detection.mask_change for growth
+            polygons: Also trace simplified site outlines
+            labels: Optional int32 [H, W] array (e.g. np.memmap) for the label raster
+
+        Returns:
+            List of site dicts, largest first
+        """
+        height, width = mask.shape
+        if labels is None:
+            labels = np.zeros((height, width), dtype=np.int32)
+        row_area = np.broadcast_to(np.asarray(pixel_area_ha, dtype=np.float64), (height,))
+
+        tables = []
+        parent = [0]
+        above = None
+        offset = 0
+        for top in range(0, height, self.strip_rows):
+            strip = (np.asarray(mask[top:top + self.strip_rows]) != 0).astype(np.uint8)
+            rows = strip.shape[0]
+            count, strip_labels, stats, _ = cv2.connectedComponentsWithStats(strip, connectivity=8, ltype=cv2.CV_32S)
+            strip_labels[strip_labels > 0] += offset
+            labels[top:top + rows] = strip_labels
+
+            parent.extend(range(offset + 1, offset + count))
+            if above is not None:
+                for a, b in seam_pairs(above, strip_labels[0]):
+                    root_a, root_b = _find(parent, a), _find(parent, b)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+            above = strip_labels[-1].copy()
+
+            tables.append(self._strip_table(strip_labels, stats[1:], top, offset + count, row_area[top:top + rows],
+                                            None if change is None else np.asarray(change[top:top + rows])))
+            offset += count - 1
+
+        sites = self._merge(tables, parent, offset, change is not None)
+        if polygons and sites:
+            self._trace(sites, labels, parent, transform)
+        if transform is not None:
+            for site in sites:
+                site['centroid'] = list(transform * tuple(site['centroid']))
+        return sites
+
+    @staticmethod
+    def _strip_table(strip_labels, stats, top, size, row_area, change):
+        """Per-global-label sums for one strip (arrays of length size)"""
+        flat = strip_labels.ravel()
+        height, width = strip_labels.shape
+        table = {
+            'pixels': np.bincount(flat, minlength=size),
+            'area': np.bincount(flat, weights=np.repeat(row_area, width), minlength=size),
+            'sum_x': np.bincount(flat, weights=np.tile(np.arange(width, dtype=np.float64), height), minlength=size),
+            'sum_y': np.bincount(flat, weights=np.repeat(np.arange(top, top + height, dtype=np.float64), width),
+                                 minlength=size),
+        }
+        # Bounding boxes straight from OpenCV, indexed by global label
+        first = size - len(stats)
+        box = np.zeros((size, 4), dtype=np.int64)
+        box[first:, 0] = stats[:, cv2.CC_STAT_LEFT]
+        box[first:, 1] = stats[:, cv2.CC_STAT_TOP] + top
+        box[first:, 2] = stats[:, cv2.CC_STAT_LEFT] + stats[:, cv2.CC_STAT_WIDTH]
+        box[first:, 3] = stats[:, cv2.CC_STAT_TOP] + stats[:, cv2.CC_STAT_HEIGHT] + top
+        table['box'] = box
+        table['first'] = first
+        if change is not None:
+            codes = change.ravel()
+            table['gained'] = np.bincount(flat[codes == GAINED], minlength=size)
+            table['persistent'] = np.bincount(flat[codes == PERSISTENT], minlength=size)
+        return table
+
+    def _merge(self, tables, parent, labels_count, with_change):
+        """Fold component sums onto merged sites"""
+        roots = np.array([_find(parent, label) for label in range(labels_count + 1)], dtype=np.int64)
+        totals = {key: np.zeros(labels_count + 1) for key in ('pixels', 'area', 'sum_x', 'sum_y', 'gained', 'persistent')}
+        box = np.zeros((labels_count + 1, 4), dtype=np.int64)
+        box[:, :2] = np.iinfo(np.int64).max
+
+        for table in tables:
+            size = len(table['pixels'])
+            for key in totals:
+                if key in table:
+                    np.add.at(totals[key], roots[:size], table[key])
+            members = np.arange(table['first'], size)
+            np.minimum.at(box[:, 0], roots[members], table['box'][members, 0])
+            np.minimum.at(box[:, 1], roots[members], table['box'][members, 1])
+            np.maximum.at(box[:, 2], roots[members], table['box'][members, 2])
+            np.maximum.at(box[:, 3], roots[members], table['box'][members, 3])
+
+        sites = []
+        for root in np.unique(roots[1:]):
+            pixels = int(totals['pixels'][root])
+            if pixels < self.min_pixels:
+                continue
+            site = {
+                'label': int(root),
+                'pixels': pixels,
+                'area_ha': float(totals['area'][root]),
+                # Pixel-centre centroid (x, y)
+                'centroid': [totals['sum_x'][root] / pixels + 0.5, totals['sum_y'][root] / pixels + 0.5],
+                'bbox_px': [int(v) for v in box[root]]
+            }
+            if with_change:
+                gained, persistent = totals['gained'][root], totals['persistent'][root]
+                site['gained_ha'] = float(site['area_ha'] * gained / pixels)
+                site['previous_ha'] = float(site['area_ha'] * persistent / pixels)
+                site['is_new'] = bool(persistent == 0)
+            sites.append(site)
+
+        sites.sort(key=lambda site: site['area_ha'], reverse=True)
+        for site_id, site in enumerate(sites, start=1):
+            site['id'] = site_id
+        return sites
+
+    def _trace(self, sites, labels, parent, transform):
+        """Simplified outer ring of each site, traced inside its bounding box"""
+        for site in sites:
+            x0, y0, x1, y1 = site['bbox_px']
+            crop = labels[y0:y1, x0:x1]
+            members = np.unique(crop[crop > 0])
+            members = members[[_find(parent, int(label)) == site['label'] for label in members]]
+            region = np.isin(crop, members).astype(np.uint8)
+            contours, _ = cv2.findContours(region, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            outline = max(contours, key=cv2.contourArea)
+            outline = cv2.approxPolyDP(outline, self.tolerance_px, True)[:, 0, :].astype(np.float64)
+            outline += (x0 + 0.5, y0 + 0.5)
+            ring = [list(transform * tuple(point)) if transform is not None else point.tolist() for point in outline]
+            site['polygon'] = ring + ring[:1]
+
+
+def sites_geojson(sites, **properties):
+    """GeoJSON FeatureCollection of site outlines (sites without polygons become points)"""
+    features = []
+    for site in sites:
+        fields = {key: value for key, value in site.items() if key not in ('polygon', 'label')}
+        fields.update(properties)
+        geometry = (
+            {'type': 'Polygon', 'coordinates': [site['polygon']]} if len(site.get('polygon', [])) >= 4
+            else {'type': 'Point', 'coordinates': site['centroid']}
+        )
+        features.append({'type': 'Feature', 'geometry': geometry, 'properties': fields})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def save_geojson(sites, path, **properties):
+    with open(path, 'w') as f:
+        json.dump(sites_geojson(sites, **properties), f)
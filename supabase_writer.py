@@ -0,0 +1,125 @@
+"""
+📤 Buffered Supabase Writer
+Collects rows per table and writes them as batched upserts, flushed by size
+or age, keyed on an idempotency column so retried batches never duplicate rows
+"""
+
+import hashlib
+import threading
+import time
+
+from http_transport import execute
+
+# Column with a unique index on every table written through here (see setup_database.sql)
+IDEMPOTENCY_COLUMN = 'idempotency_key'
+
+# Rows per upsert, and the longest a buffered row waits before a timed flush
+WRITE_BATCH_ROWS = 100
+WRITE_FLUSH_SECONDS = 5.0
+
+
+def idempotency_key(*parts):
+    """Stable key for one logical record, e.g. ('mining_predictions', aoi_id, date, model_version)"""
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+
+def upsert_rows(client, table, rows):
+    """Upsert rows on the idempotency column through the shared transport's retries"""
+    query = client.table(table).upsert(rows, on_conflict=IDEMPOTENCY_COLUMN)
+    return execute(query, f'supabase:{table}')
+
+
+class BufferedWriter:
+    """
+    Buffered upserts into one table
+
+    add() queues a row (a later row with the same key replaces an earlier
+    one) and flushes once batch_rows are waiting; a background thread
+    flushes rows older than flush_seconds. A failed flush puts its rows
+    back for the next attempt, and because every row carries its
+    idempotency key, a batch that was written but not acknowledged is
+    simply upserted again. Ids of written rows are kept in `ids` by key.
+    """
+
+    def __init__(self, client, table, batch_rows=WRITE_BATCH_ROWS, flush_seconds=WRITE_FLUSH_SECONDS):
+        self.client = client
+        self.table = table
+        self.batch_rows = max(1, batch_rows)
+        self.flush_seconds = flush_seconds
+        self.rows = {}
+        self.oldest = None
+        self.ids = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.stop = threading.Event()
+        self.thread = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_seconds_total = 0.0
+
+    def add(self, row):
+        """Queue a row (it must carry IDEMPOTENCY_COLUMN); returns its key"""
+        key = row[IDEMPOTENCY_COLUMN]
+        with self.lock:
+            self.rows[key] = row
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            full = len(self.rows) >= self.batch_rows
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._flush_periodically,
+                                               name=f'writer-{self.table}', daemon=True)
+                self.thread.start()
+        if full:
+            self.flush()
+        return key
+
+    def flush(self):
+        """Upsert every buffered row in batches of batch_rows; returns the number written"""
+        written = 0
+        with self.flush_lock:
+            with self.lock:
+                pending, self.rows, self.oldest = self.rows, {}, None
+
+            batches = list(pending.items())
+            for start in range(0, len(batches), self.batch_rows):
+                batch = batches[start:start + self.batch_rows]
+                started = time.perf_counter()
+                try:
+                    response = upsert_rows(self.client, self.table, [row for _, row in batch])
+                except Exception:
+                    # Keep unwritten rows (unless a newer version was queued meanwhile)
+                    with self.lock:
+                        for key, row in batches[start:]:
+                            self.rows.setdefault(key, row)
+                        self.oldest = self.oldest or time.monotonic()
+                    raise
+                self.flush_seconds_total += time.perf_counter() - started
+                self.flushes += 1
+                self.rows_written += len(batch)
+                written += len(batch)
+                for record in response.data or []:
+                    if IDEMPOTENCY_COLUMN in record:
+                        self.ids[record[IDEMPOTENCY_COLUMN]] = record.get('id')
+        return written
+
+    def _flush_periodically(self):
+        while not self.stop.wait(min(1.0, self.flush_seconds)):
+            with self.lock:
+                due = self.oldest is not None and time.monotonic() - self.oldest >= self.flush_seconds
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"⚠️  Timed flush of {self.table} failed, will retry: {e}")
+
+    def close(self):
+        """Stop the timer and write whatever is still buffered"""
+        self.stop.set()
+        if self.thread is not None:
+            self.thread.join()
+        return self.flush()
+
+    def summary(self):
+        mean = self.flush_seconds_total / self.flushes if self.flushes else 0.0
+        return (f"📤 {self.table}: {self.rows_written} rows in {self.flushes} upserts "
+                f"({mean:.2f}s mean), {len(self.rows)} pending")
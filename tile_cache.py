@@ -0,0 +1,171 @@
+"""
+🗄️ Tile Prediction Cache
+Content-addressed on-disk cache of U-Net tile probabilities, shared by every
+process that points at the same directory
+"""
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction runs unlocked
+    fcntl = None
+
+TILE_CACHE_DIR = "cache/tiles"
+TILE_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Eviction trims the cache to this fraction of the cap so it does not run on every write
+EVICT_TO_FRACTION = 0.9
+
+
+def tile_key(data, model_version, variant=''):
+    """
+    sha256 of the model version, inference variant, tile shape and tile pixels
+
+    The variant names how the model was run (backend and inference
+    profile, e.g. 'torch-int8'), since reduced-precision outputs differ
+    from fp32 ones and must not be served to other runs.
+    """
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    digest = hashlib.sha256()
+    digest.update(model_version.encode('utf-8'))
+    digest.update(b'\0' + variant.encode('utf-8'))
+    digest.update(repr(data.shape).encode('ascii'))
+    digest.update(data.tobytes())
+    return digest.hexdigest()
+
+
+def evict_lru(directory, pattern, max_bytes, remove=None, keep=None):
+    """
+    Trim files matching pattern under directory to EVICT_TO_FRACTION of max_bytes, oldest mtime first
+
+    Holds an exclusive lock on <directory>/.lock so concurrent processes
+    do not evict at the same time.
+
+    Args:
+        pattern: Glob pattern, or a tuple of them
+        remove: Callable deleting an entry (default: unlink the file)
+        keep: Predicate for entries that count towards the total but are never removed
+
+    Returns:
+        Number of entries evicted
+    """
+    remove = remove or (lambda path: path.unlink(missing_ok=True))
+    patterns = (pattern,) if isinstance(pattern, str) else tuple(pattern)
+    with open(Path(directory) / '.lock', 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        entries = []
+        total = 0
+        for path in (path for pattern in patterns for path in Path(directory).glob(pattern)):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= max_bytes:
+            return 0
+
+        evicted = 0
+        target = max_bytes * EVICT_TO_FRACTION
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            if keep is not None and keep(path):
+                continue
+            remove(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+
+class TilePredictionCache:
+    """
+    Tile filter backed by a content-addressed directory of float16 .npy tiles
+
+    Entries live at <dir>/<key[:2]>/<key>.npy. Writes go to a unique
+    temporary file and are renamed into place, so concurrent processes
+    never see partial entries; a hit bumps the file's mtime, which is the
+    LRU clock used by evict(). Eviction takes an exclusive lock on
+    <dir>/.lock so only one process trims at a time, and readers treat an
+    entry deleted underneath them as a miss.
+    """
+
+    name = 'cache'
+
+    def __init__(self, cache_dir, model_version, max_bytes=TILE_CACHE_MAX_BYTES, model_bands=3, variant=''):
+        self.cache_dir = Path(cache_dir)
+        self.model_version = model_version
+        self.variant = variant
+        self.max_bytes = max_bytes
+        self.model_bands = model_bands
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.begin(None)
+
+    def begin(self, grid):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evicted = 0
+        self.pending = {}
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.npy'
+
+    def lookup(self, tile, data):
+        key = tile_key(data[:self.model_bands], self.model_version, self.variant)
+        path = self._path(key)
+        try:
+            prob = np.load(path).astype(np.float32)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            self.pending[tile.index] = key
+            return None
+
+        self.hits += 1
+        return prob
+
+    def store(self, tile, prob):
+        key = self.pending.pop(tile.index, None)
+        if key is None:
+            return
+        prob = np.broadcast_to(np.asarray(prob, dtype=np.float16), (tile.height, tile.width))
+
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f'.{key}.{uuid.uuid4().hex[:8]}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, prob)
+        os.replace(tmp_path, path)
+        self.stores += 1
+
+    def finish(self):
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries once the cache exceeds its cap"""
+        self.evicted += evict_lru(self.cache_dir, '*/*.npy', self.max_bytes)
+
+    def report(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stored': self.stores,
+            'evicted': self.evicted
+        }
+
+    def summary(self):
+        report = self.report()
+        return (f"Tile cache: {report['hits']} hits, {report['misses']} misses "
+                f"({report['hit_rate']:.0%} hit rate), {report['stored']} stored, {report['evicted']} evicted")
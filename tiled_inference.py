@@ -0,0 +1,386 @@
+"""
+🧩 Tiled Inference Engine
+Runs the U-Net over fixed-size overlapping tiles and blends them into one probability map
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# The U-Net pools four times, so every tile side must be a multiple of 2**4
+UNET_SIZE_MULTIPLE = 16
+
+# Rows normalized per step when dividing the accumulated map by the blend weights
+NORMALIZE_CHUNK_ROWS = 1024
+
+# Seconds the prefetch thread waits on a full queue before re-checking for cancellation
+PREFETCH_POLL_SECONDS = 0.5
+
+Tile = namedtuple('Tile', ['index', 'row', 'col', 'y', 'x', 'height', 'width'])
+
+_END_OF_TILES = object()
+
+
+# ========================================
+# Tile Grid
+# ========================================
+
+def tile_starts(length, tile_size, stride):
+    """
+    Start offsets of tiles covering [0, length)
+
+    The last tile is placed flush against the far edge so every tile
+    (except on rasters smaller than one tile) lies fully inside the image.
+    """
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, stride))
+    starts.append(length - tile_size)
+    return starts
+
+
+def blend_window(tile_size, overlap):
+    """
+    1-D blending weights for one tile side
+
+    Weights ramp linearly across the overlap band and stay at 1 in the
+    tile centre. They never reach zero, so pixels covered by a single
+    tile edge still normalize correctly.
+    """
+    idx = np.arange(tile_size, dtype=np.float32)
+    ramp = np.minimum((idx + 1) / (overlap + 1), (tile_size - idx) / (overlap + 1))
+    return np.minimum(ramp, 1.0).astype(np.float32)
+
+
+class TileGrid:
+    """Overlapping tile layout over an H x W raster"""
+
+    def __init__(self, height, width, tile_size=256, overlap=32):
+        if tile_size % UNET_SIZE_MULTIPLE != 0:
+            raise ValueError(f"tile_size must be a multiple of {UNET_SIZE_MULTIPLE}, got {tile_size}")
+        if not 0 <= overlap < tile_size:
+            raise ValueError(f"overlap must be in [0, tile_size), got {overlap}")
+
+        self.height = height
+        self.width = width
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.stride = tile_size - overlap
+
+        self.row_starts = tile_starts(height, tile_size, self.stride)
+        self.col_starts = tile_starts(width, tile_size, self.stride)
+        self.window = blend_window(tile_size, overlap)
+
+    def __len__(self):
+        return len(self.row_starts) * len(self.col_starts)
+
+    def __iter__(self):
+        index = 0
+        for row, y in enumerate(self.row_starts):
+            for col, x in enumerate(self.col_starts):
+                yield Tile(
+                    index=index, row=row, col=col, y=y, x=x,
+                    height=min(self.tile_size, self.height - y),
+                    width=min(self.tile_size, self.width - x)
+                )
+                index += 1
+
+    def tile_weights(self, tile):
+        """2-D blending weights for one tile, cropped to its valid extent"""
+        return np.outer(self.window[:tile.height], self.window[:tile.width])
+
+    def weight_sums(self):
+        """
+        Per-row and per-column sums of the blending weights
+
+        The grid is the Cartesian product of row and column starts, so the
+        total weight at (y, x) is row_sum[y] * col_sum[x] and never needs
+        a full-size accumulator.
+        """
+        return (
+            self._axis_sum(self.height, self.row_starts),
+            self._axis_sum(self.width, self.col_starts)
+        )
+
+    def _axis_sum(self, length, starts):
+        total = np.zeros(length, dtype=np.float32)
+        for start in starts:
+            extent = min(self.tile_size, length - start)
+            total[start:start + extent] += self.window[:extent]
+        return total
+
+
+# ========================================
+# Tile Sources
+# ========================================
+
+class ArrayTileSource:
+    """Serves tiles from an in-memory [C, H, W] float32 array"""
+
+    def __init__(self, array):
+        self.array = array
+        self.bands, self.height, self.width = array.shape
+
+    @property
+    def shape(self):
+        return self.height, self.width
+
+    def read_tile(self, tile):
+        """Return the [C, h, w] block under a tile"""
+        return self.array[:, tile.y:tile.y + tile.height, tile.x:tile.x + tile.width]
+
+
+# ========================================
+# Throughput Counters
+# ========================================
+
+class InferenceStats:
+    """Tiles/sec and batch-occupancy counters for one predict() call"""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.tiles = 0
+        self.batches = 0
+        self.compute_seconds = 0.0
+        self.first_batch_seconds = None
+        self.wait_seconds = 0.0
+        self.elapsed_seconds = 0.0
+        self.resolved = {}
+
+    def record_resolved(self, name, tiles=1):
+        """Count tiles answered by a tile filter without running the model"""
+        self.resolved[name] = self.resolved.get(name, 0) + tiles
+
+    def record_batch(self, tiles, compute_seconds, wait_seconds):
+        if self.first_batch_seconds is None:
+            self.first_batch_seconds = compute_seconds
+        self.tiles += tiles
+        self.batches += 1
+        self.compute_seconds += compute_seconds
+        self.wait_seconds += wait_seconds
+
+    @property
+    def tiles_per_sec(self):
+        return self.tiles / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def batch_occupancy(self):
+        """Fraction of batch slots filled with real tiles"""
+        slots = self.batches * self.batch_size
+        return self.tiles / slots if slots else 0.0
+
+    def as_dict(self):
+        return {
+            'tiles': self.tiles,
+            'batches': self.batches,
+            'batch_size': self.batch_size,
+            'tiles_per_sec': self.tiles_per_sec,
+            'batch_occupancy': self.batch_occupancy,
+            'compute_seconds': self.compute_seconds,
+            'first_batch_seconds': self.first_batch_seconds,
+            'wait_seconds': self.wait_seconds,
+            'elapsed_seconds': self.elapsed_seconds,
+            'resolved': dict(self.resolved)
+        }
+
+    def summary(self):
+        text = (
+            f"{self.tiles} tiles in {self.elapsed_seconds:.2f}s "
+            f"({self.tiles_per_sec:.1f} tiles/s, {self.batches} batches of {self.batch_size}, "
+            f"occupancy {self.batch_occupancy:.0%}, waited {self.wait_seconds:.2f}s on input)"
+        )
+        for name, count in self.resolved.items():
+            text += f", {count} tiles answered by {name}"
+        return text
+
+
+# ========================================
+# Inference Engine
+# ========================================
+
+class TiledInferenceEngine:
+    """
+    Sliding-window U-Net inference with weighted overlap blending
+
+    Tiles are read, padded and stacked into batches by a background thread
+    while the previous batch runs through the backend (see inference_backends).
+
+    Tile filters can answer a tile before it reaches the model. A filter
+    has a name and lookup(tile, data) -> probabilities (array or scalar) or
+    None, and optionally begin(grid), store(tile, prob), finish() and
+    abort() (called instead of finish() when the run fails).
+    lookup runs on the producer thread, in filter order, on all source
+    bands. store is called on the consumer thread for every filter that
+    missed, with the final probabilities of that tile.
+    """
+
+    def __init__(self, backend, tile_size=256, overlap=32, batch_size=8, prefetch_batches=2,
+                 model_bands=3, tile_filters=None):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        self.backend = backend
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.prefetch_batches = max(1, prefetch_batches)
+        self.model_bands = model_bands
+        self.tile_filters = list(tile_filters or [])
+        self.last_stats = None
+
+    def make_grid(self, height, width):
+        return TileGrid(height, width, self.tile_size, self.overlap)
+
+    def predict(self, source, out=None):
+        """
+        Predict a seamless probability map for a tile source
+
+        Args:
+            source: Object with height, width and read_tile(tile) -> [C, h, w]
+            out: Optional float32 [H, W] array (e.g. np.memmap) to fill in place
+
+        Returns:
+            float32 [H, W] mining probability map
+        """
+        grid = self.make_grid(source.height, source.width)
+
+        if out is None:
+            out = np.zeros((source.height, source.width), dtype=np.float32)
+        else:
+            out[...] = 0
+
+        stats = InferenceStats(self.batch_size)
+        for tile_filter in self.tile_filters:
+            if hasattr(tile_filter, 'begin'):
+                tile_filter.begin(grid)
+
+        batches = queue.Queue(maxsize=self.prefetch_batches)
+        cancelled = threading.Event()
+        producer = threading.Thread(
+            target=self._produce_batches,
+            args=(source, grid, batches, cancelled),
+            name='tile-prefetch',
+            daemon=True
+        )
+
+        started = time.perf_counter()
+        producer.start()
+        completed = False
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                item = batches.get()
+                waited = time.perf_counter() - wait_start
+
+                if item is _END_OF_TILES:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                tiles, batch, resolved = item
+                for tile, prob, resolver in resolved:
+                    self._accumulate(out, grid, tile, prob)
+                    self._store(tile, prob, self.tile_filters[:resolver])
+                    stats.record_resolved(self.tile_filters[resolver].name)
+
+                if batch is None:
+                    continue
+
+                compute_start = time.perf_counter()
+                probs = self.backend.predict_batch(batch)
+                for tile, prob in zip(tiles, probs):
+                    prob = prob[:tile.height, :tile.width]
+                    self._accumulate(out, grid, tile, prob)
+                    self._store(tile, prob, self.tile_filters)
+                stats.record_batch(len(tiles), time.perf_counter() - compute_start, waited)
+            completed = True
+        finally:
+            cancelled.set()
+            producer.join()
+            if not completed:
+                # Let stateful filters release what begin() took (e.g. the incremental state lock)
+                for tile_filter in self.tile_filters:
+                    if hasattr(tile_filter, 'abort'):
+                        tile_filter.abort()
+
+        for tile_filter in self.tile_filters:
+            if hasattr(tile_filter, 'finish'):
+                tile_filter.finish()
+
+        self._normalize(out, grid)
+        stats.elapsed_seconds = time.perf_counter() - started
+        self.last_stats = stats
+        return out
+
+    def _produce_batches(self, source, grid, batches, cancelled):
+        """Background producer: read tiles, run filter lookups, then queue padded batches"""
+        try:
+            tiles, blocks, resolved = [], [], []
+            for tile in grid:
+                if cancelled.is_set():
+                    return
+
+                data = source.read_tile(tile)
+                answer = self._lookup(tile, data)
+                if answer is not None:
+                    resolved.append(answer)
+                    if len(resolved) == self.batch_size:
+                        self._put(batches, ([], None, resolved), cancelled)
+                        resolved = []
+                    continue
+
+                tiles.append(tile)
+                blocks.append(self.pad_tile(data[:self.model_bands]))
+                if len(tiles) == self.batch_size:
+                    self._put(batches, (tiles, np.stack(blocks).astype(np.float32, copy=False), resolved), cancelled)
+                    tiles, blocks, resolved = [], [], []
+
+            if tiles or resolved:
+                batch = np.stack(blocks).astype(np.float32, copy=False) if tiles else None
+                self._put(batches, (tiles, batch, resolved), cancelled)
+            self._put(batches, _END_OF_TILES, cancelled)
+        except Exception as e:
+            self._put(batches, e, cancelled)
+
+    def _lookup(self, tile, data):
+        """First filter answer for a tile as (tile, prob, filter index), or None"""
+        for index, tile_filter in enumerate(self.tile_filters):
+            prob = tile_filter.lookup(tile, data)
+            if prob is not None:
+                return tile, prob, index
+        return None
+
+    def _store(self, tile, prob, tile_filters):
+        for tile_filter in tile_filters:
+            if hasattr(tile_filter, 'store'):
+                tile_filter.store(tile, prob)
+
+    def _put(self, batches, item, cancelled):
+        while not cancelled.is_set():
+            try:
+                batches.put(item, timeout=PREFETCH_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _accumulate(self, out, grid, tile, prob):
+        if np.isscalar(prob) and prob == 0:
+            return
+        out[tile.y:tile.y + tile.height, tile.x:tile.x + tile.width] += prob * grid.tile_weights(tile)
+
+    def _normalize(self, out, grid):
+        row_sum, col_sum = grid.weight_sums()
+        for start in range(0, grid.height, NORMALIZE_CHUNK_ROWS):
+            stop = min(start + NORMALIZE_CHUNK_ROWS, grid.height)
+            out[start:stop] /= np.outer(row_sum[start:stop], col_sum)
+
+    def pad_tile(self, data):
+        """Pad a [C, h, w] block to the full tile size by mirroring its edges"""
+        pad_h = self.tile_size - data.shape[1]
+        pad_w = self.tile_size - data.shape[2]
+        if pad_h == 0 and pad_w == 0:
+            return data
+        return np.pad(data, ((0, 0), (0, pad_h), (0, pad_w)), mode='symmetric')